@@ -5,5 +5,6 @@ __all__ = [
     "bank_strategy",
     "compliance_agent",
     "fairness_agent",
+    "fairness_monitor",
     "meta_rl_agent",
 ]
@@ -1,4 +1,5 @@
 import numpy as np
+from ..math.contract_schedule import evaluate_contract
 
 class BankStrategyAgent:
     def __init__(self, base_rate=0.12, capital_ratio=0.12, default_threshold=0.3):
@@ -15,22 +16,25 @@ class BankStrategyAgent:
         tenure = 120
         grace = False
         restructure_pct = 0.0
-        expected_interest = float(rate * exposure * tenure / 12.0)
+        lgd = 0.4
         risk_exposure = float(p * exposure)
         capital_req = 0.12
         capital_ok = bool(self.capital_ratio >= capital_req)
-        lgd = 0.4
         provisioning_cost = float(p * exposure * lgd * 0.1)
         dynamic_shift = float(rate - self.base_rate)
+        offer = {
+            "interest_rate": rate,
+            "tenure_months": tenure,
+            "grace_period": grace,
+            "restructure_pct": restructure_pct,
+            "collateral_change": collateral_change,
+        }
+        value = evaluate_contract(offer, exposure, p, lgd=lgd)
         return {
-            "offer": {
-                "interest_rate": rate,
-                "tenure_months": tenure,
-                "grace_period": grace,
-                "restructure_pct": restructure_pct,
-                "collateral_change": collateral_change,
-            },
-            "profit_expectation": expected_interest,
+            "offer": offer,
+            "profit_expectation": value["el_adjusted_profit"],
+            "npv": value["npv"],
+            "expected_loss": value["expected_loss"],
             "risk_exposure": risk_exposure,
             "capital_constraint_ok": capital_ok,
             "provisioning_cost": provisioning_cost,
@@ -1,78 +1,203 @@
 import json
+import os
+from collections import OrderedDict
+from .rule_engine import RuleEngine
+from .rule_index import INDEX_DIR, RuleIndex, rules_digest
+
+DEFAULT_RULES = [
+    "APR disclosure must be clear",
+    "Grace period terms must be explicit",
+    "Collateral changes require customer consent",
+    "Interest rate changes must respect caps",
+    "Tenure cannot exceed policy maximum",
+]
+
+TOP_K = 3
+MIN_SIMILARITY = float(os.environ.get("AEGIS_RULE_MIN_SIMILARITY", "0.3"))
+
+POLICY_PRECISION = {
+    "interest_rate": 4,
+    "restructure_pct": 4,
+    "collateral_change": 4,
+}
 
 class ComplianceAgent:
-    def __init__(self):
-        self.embedder = None
-        self.faiss = None
-        self.rules = [
-            "APR disclosure must be clear",
-            "Grace period terms must be explicit",
-            "Collateral changes require customer consent",
-            "Interest rate changes must respect caps",
-            "Tenure cannot exceed policy maximum",
-        ]
-        try:
-            from sentence_transformers import SentenceTransformer
-            import faiss
-            self.embedder = SentenceTransformer("sentence-transformers/paraphrase-MiniLM-L6-v2")
-            self.faiss = faiss
-            X = self.embedder.encode(self.rules)
-            index = faiss.IndexFlatIP(X.shape[1])
-            index.add(X.astype("float32"))
-            self.index = index
-        except Exception:
-            self.index = None
+    def __init__(self, rules=None, cache_size=1024, precision=None, policy=None, semantic=True, index_path=INDEX_DIR,
+                 top_k=TOP_K, min_similarity=MIN_SIMILARITY):
+        self.engine = RuleEngine(policy)
+        self.semantic = semantic
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.index_path = index_path
+        self.rule_index = None
+        self._index_state = None
+        self.cache_size = cache_size
+        self.precision = dict(POLICY_PRECISION, **(precision or {}))
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.set_rules(rules or DEFAULT_RULES)
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules):
+        self.set_rules(rules)
+
+    def set_policy(self, policy):
+        self.engine = RuleEngine(policy)
+        self.cache.clear()
+
+    def set_rules(self, rules):
+        self._rules = tuple(rules)
+        self._rules_digest = rules_digest(self._rules)
+        self.cache.clear()
+        self.rule_index = None
+        self._index_state = None
+
+    def _semantic_index(self):
+        if not self.semantic or self._index_state == "unavailable":
+            return None
+        if self._index_state is None:
+            try:
+                index = RuleIndex.load(self.index_path) if self.index_path else None
+                if index is None or index.digest != self._rules_digest:
+                    index = RuleIndex.from_rules(self._rules)
+                index.embedder
+                self.rule_index = index
+                self._index_state = "ready"
+            except Exception:
+                self.rule_index = None
+                self._index_state = "unavailable"
+                return None
+        return self.rule_index
+
+    def _canonical(self, contract_json):
+        return {k: round(v, self.precision.get(k, 6)) if isinstance(v, float) else v for k, v in contract_json.items()}
+
+    def _key(self, contract):
+        items = []
+        for k, v in contract.items():
+            if not isinstance(v, (int, float, str, bool, type(None))):
+                v = json.dumps(v, sort_keys=True)
+            items.append((k, v))
+        return (self.engine.version, self._rules_digest, tuple(sorted(items)))
+
+    def _cache_get(self, key):
+        res = self.cache.get(key)
+        if res is None:
+            self.cache_misses += 1
+            return None
+        self.cache_hits += 1
+        self.cache.move_to_end(key)
+        return _copy_result(res)
+
+    def _cache_put(self, key, res):
+        self.cache[key] = res
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def cache_info(self):
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self.cache),
+            "max_size": self.cache_size,
+            "hit_rate": float(self.cache_hits / total) if total else 0.0,
+        }
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def validate(self, contract_json):
-        text = json.dumps(contract_json, sort_keys=True)
-        violations = []
-        score = 100.0
-        if self.index is not None and self.embedder is not None:
-            q = self.embedder.encode([text]).astype("float32")
-            D, I = self.index.search(q, 3)
-            refs = [self.rules[i] for i in I[0]]
-            score = float(min(100.0, 70.0 + 5.0 * float(D[0].mean())))
-            for r in self.rules:
-                if r not in refs and any(k in text.lower() for k in ["rate", "tenure", "grace", "collateral"]):
+        contract = self._canonical(contract_json)
+        key = self._key(contract)
+        res = self._cache_get(key)
+        if res is not None:
+            return res
+        text = json.dumps(contract, sort_keys=True)
+        search = None
+        index = self._semantic_index()
+        if index is not None:
+            D, I = index.search([text], self.top_k)
+            search = (D[0], I[0])
+        res = self._evaluate(self.engine.check(contract), text, search)
+        self._cache_put(key, res)
+        return _copy_result(res)
+
+    def validate_many(self, contracts):
+        results = [None] * len(contracts)
+        pending = {}
+        contracts = [self._canonical(c) for c in contracts]
+        for i, c in enumerate(contracts):
+            key = self._key(c)
+            res = self._cache_get(key)
+            if res is not None:
+                results[i] = res
+            else:
+                pending.setdefault(key, []).append(i)
+        if not pending:
+            return results
+        keys = list(pending)
+        dups = len(contracts) - sum(1 for r in results if r is not None) - len(keys)
+        self.cache_misses -= dups
+        self.cache_hits += dups
+        firsts = [contracts[pending[k][0]] for k in keys]
+        texts = [json.dumps(c, sort_keys=True) for c in firsts]
+        searches = [None] * len(keys)
+        index = self._semantic_index()
+        if index is not None:
+            D, I = index.search(texts, self.top_k)
+            searches = list(zip(D, I))
+        structured = self.engine.check_many(firsts)
+        for key, base, text, search in zip(keys, structured, texts, searches):
+            res = self._evaluate(base, text, search)
+            self._cache_put(key, res)
+            for i in pending[key]:
+                results[i] = _copy_result(res)
+        return results
+
+    def _evaluate(self, structured, text, search):
+        if search is None:
+            return structured
+        D, I = search
+        hits = I >= 0
+        semantic_score = float(max(0.0, min(50.0 * (1.0 + float(D[hits].mean())), 100.0))) if hits.any() else 0.0
+        violations = list(structured["violations"])
+        amendments = list(structured["amendments"])
+        checks = structured["checks"]
+        if any(k in text.lower() for k in ["rate", "tenure", "grace", "collateral"]):
+            checks += int(hits.sum())
+            for d, i in zip(D, I):
+                if i >= 0 and d < self.min_similarity:
+                    r = self._rules[i]
                     violations.append(r)
-        else:
-            checks = {
-                "apr": "apr" in text.lower() or "interest_rate" in text.lower(),
-                "grace": "grace" in text.lower(),
-                "collateral": "collateral" in text.lower(),
-                "tenure": "tenure" in text.lower(),
-            }
-            score = float(60.0 + 10.0 * sum(1 for v in checks.values() if v))
-            for k, v in checks.items():
-                if not v:
-                    violations.append(f"missing {k}")
-        rate = None
-        tenure = None
-        try:
-            rate = float(contract_json.get("interest_rate", None))
-        except Exception:
-            rate = None
-        try:
-            tenure = int(contract_json.get("tenure_months", None))
-        except Exception:
-            tenure = None
-        rate_cap = 0.20
-        max_tenure = 360
-        if rate is not None and rate > rate_cap:
-            violations.append("interest rate cap exceeded")
-            score -= 8.0
-        if tenure is not None and tenure > max_tenure:
-            violations.append("tenure exceeds policy maximum")
-            score -= 6.0
-        amendments = []
-        for v in violations:
-            if "APR" in v or "apr" in v or "interest_rate" in text:
-                amendments.append("add APR disclosure clause")
-            elif "grace" in v:
-                amendments.append("define grace period conditions")
-            elif "collateral" in v:
-                amendments.append("include collateral change consent section")
-            elif "tenure" in v:
-                amendments.append("state maximum tenure and policy reference")
-        flags = {"kyc_flag": False, "aml_flag": False}
-        return {"compliance_score": float(max(0.0, min(score, 100.0))), "violations": violations, "amendments": amendments, "flags": flags, "reasoning": "rule matching and vector search"}
+                    a = _semantic_amendment(r)
+                    if a and a not in amendments:
+                        amendments.append(a)
+        return {"compliance_score": structured["compliance_score"], "semantic_score": semantic_score, "violations": violations, "checks": checks, "amendments": amendments, "flags": structured["flags"], "reasoning": "structured rule engine and vector search"}
+
+def _semantic_amendment(rule):
+    r = rule.lower()
+    if "apr" in r or "interest rate" in r:
+        return "add APR disclosure clause"
+    if "grace" in r:
+        return "define grace period conditions"
+    if "collateral" in r:
+        return "include collateral change consent section"
+    if "tenure" in r:
+        return "state maximum tenure and policy reference"
+    return None
+
+def _copy_result(res):
+    out = dict(res)
+    out["violations"] = list(res["violations"])
+    out["amendments"] = list(res["amendments"])
+    out["flags"] = dict(res["flags"])
+    return out
@@ -1,78 +1,67 @@
 import os
 import numpy as np
-import pandas as pd
+from ..data.transaction_store import load_monthly
 
 class DigitalTwinAgent:
-    def __init__(self, use_torch=True):
+    def __init__(self, use_torch=True, forecaster=None, seed=None):
         self.use_torch = use_torch
-        self.torch = None
-        if use_torch:
+        self.forecaster = forecaster
+        if use_torch and forecaster is None:
             try:
-                import torch
-                import torch.nn as nn
-                self.torch = torch
-                class LSTMModel(nn.Module):
-                    def __init__(self, input_size=1, hidden_size=16, num_layers=1):
-                        super().__init__()
-                        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-                        self.fc = nn.Linear(hidden_size, 1)
-                    def forward(self, x):
-                        out, _ = self.lstm(x)
-                        out = self.fc(out[:, -1, :])
-                        return out
-                self.Model = LSTMModel
+                from ..models.forecaster import BatchForecaster
+                self.forecaster = BatchForecaster.load()
             except Exception:
-                self.use_torch = False
-
-    def load_transactions(self, csv_path):
-        df = pd.read_csv(csv_path)
-        if "date" in df.columns and "amount" in df.columns:
-            df["date"] = pd.to_datetime(df["date"])
-            df["month"] = df["date"].dt.to_period("M")
-            series = df.groupby("month")["amount"].sum().astype(float).values
-        else:
-            series = df.iloc[:, -1].astype(float).values
-        return series
+                self.forecaster = None
+        if self.forecaster is None:
+            self.use_torch = False
+            from ..models.stat_forecaster import StatForecaster
+            self.forecaster = StatForecaster(seed=seed)
+
+    def load_transactions(self, csv_path, customer=None):
+        return load_monthly(csv_path).series(customer)
 
     def forecast(self, series, months=12):
-        if self.use_torch and self.torch is not None:
-            torch = self.torch
-            nn = torch.nn
-            model = self.Model()
-            model.eval()
-            arr = torch.tensor(series, dtype=torch.float32).view(1, -1, 1)
-            preds = []
-            last = arr
-            for _ in range(months):
-                y = model(last)
-                preds.append(float(y.detach().numpy()))
-                last = torch.cat([last[:, 1:, :], y.view(1, 1, 1)], dim=1)
-            return np.array(preds)
-        ma = np.convolve(series, np.ones(3) / 3, mode="valid")
-        last = float(ma[-1]) if len(ma) else float(series[-1]) if len(series) else 0.0
-        base = np.array([last * (0.98 + 0.04 * np.random.rand()) for _ in range(months)])
-        w = np.linspace(0.6, 1.0, num=min(len(series), 6))
-        tail = np.array(series[-len(w):]) if len(series) >= len(w) else np.array(series)
-        att = (tail * w[:len(tail)]) if len(tail) else np.array([last])
-        bias = float(np.mean(att)) if len(att) else last
-        return np.clip(base * (0.9 + 0.2 * np.random.rand()), 0.0, None) + (0.05 * bias)
+        return self.forecaster.predict([series], months=months)[0]
+
+    def forecast_batch(self, series, lengths=None, months=12):
+        return self.forecaster.predict(series, lengths=lengths, months=months)
+
+    def assess_batch(self, forecasts, income, emi, credit_utilization=None):
+        F = np.asarray(forecasts, dtype=float)
+        if F.ndim == 1:
+            F = F[None, :]
+        n = len(F)
+        income = np.maximum(np.broadcast_to(np.asarray(income, dtype=float), (n,)), 1e-6)[:, None]
+        emi = np.broadcast_to(np.asarray(emi, dtype=float), (n,))[:, None]
+        ratio = emi / income
+        monthly_stress = np.maximum(0.0, (emi - np.maximum(F, 1e-6)) / income)
+        stress = np.maximum(0.0, (emi - np.maximum(F.mean(axis=1, keepdims=True), 1e-6)) / income)
+        p = _distress(ratio, stress)[:, 0]
+        if credit_utilization is not None:
+            cu_adj = np.clip(np.asarray(credit_utilization, dtype=float) - 0.3, -0.3, 0.7)
+            p = np.clip(p + 0.2 * cu_adj, 0.0, 1.0)
+        traj = _distress(ratio, monthly_stress)
+        return {
+            "default_probability": p,
+            "liquidity_stress_score": stress[:, 0],
+            "risk_trajectory_curve": traj,
+            "survival_curve": 1.0 - traj,
+        }
+
+    def row(self, batch, i):
+        return {
+            "default_probability": float(batch["default_probability"][i]),
+            "liquidity_stress_score": float(batch["liquidity_stress_score"][i]),
+            "risk_trajectory_curve": batch["risk_trajectory_curve"][i].tolist(),
+            "survival_curve": batch["survival_curve"][i].tolist(),
+        }
 
     def default_probability(self, income, debt, emi, forecast):
-        ratio = emi / max(income, 1e-6)
-        cf = float(np.mean(forecast))
-        stress = max(0.0, (emi - max(cf, 1e-6)) / max(income, 1e-6))
-        p = 1.0 / (1.0 + np.exp(-3.0 * (ratio + 0.5 * stress - 0.6)))
-        return float(np.clip(p, 0.0, 1.0)), float(stress)
+        batch = self.assess_batch(forecast, income, emi)
+        return float(batch["default_probability"][0]), float(batch["liquidity_stress_score"][0])
 
     def _risk_trajectory(self, income, emi, forecast):
-        traj = []
-        for v in forecast:
-            cf = float(v)
-            ratio = emi / max(income, 1e-6)
-            stress = max(0.0, (emi - max(cf, 1e-6)) / max(income, 1e-6))
-            p = 1.0 / (1.0 + np.exp(-3.0 * (ratio + 0.5 * stress - 0.6)))
-            traj.append(float(np.clip(p, 0.0, 1.0)))
-        return traj
+        return self.assess_batch(forecast, income, emi)["risk_trajectory_curve"][0].tolist()
 
     def _behavioral_drift(self, series):
         if len(series) < 4:
@@ -84,20 +73,57 @@ class DigitalTwinAgent:
         vol_shift = float(abs(np.std(second) - np.std(first)) / (np.std(first) + 1e-6))
         return {"drift_score": float(np.clip(mean_diff, 0.0, 1.0)), "volatility_shift": float(np.clip(vol_shift, 0.0, 1.0))}
 
-    def build(self, csv_path, income, debt, emi, documents=None, credit_utilization=None):
-        series = self.load_transactions(csv_path)
+    def build(self, csv_path, income, debt, emi, documents=None, credit_utilization=None, customer=None):
+        series = self.load_transactions(csv_path, customer)
+        return self.build_series(series, income, debt, emi, documents, credit_utilization)
+
+    def build_series(self, series, income, debt, emi, documents=None, credit_utilization=None):
         forecast = self.forecast(series)
-        p_default, liquidity_stress = self.default_probability(income, debt, emi, forecast)
-        traj = self._risk_trajectory(income, emi, forecast)
+        twin = self.row(self.assess_batch(forecast, income, emi, credit_utilization or 0.3), 0)
         drift = self._behavioral_drift(series.tolist() if hasattr(series, "tolist") else list(series))
-        cu_adj = float(np.clip((credit_utilization or 0.3) - 0.3, -0.3, 0.7))
-        p_default = float(np.clip(p_default + 0.2 * cu_adj, 0.0, 1.0))
         return {
             "cashflow_forecast": forecast.tolist(),
-            "default_probability": p_default,
-            "liquidity_stress_score": liquidity_stress,
-            "risk_trajectory_curve": traj,
+            "default_probability": twin["default_probability"],
+            "liquidity_stress_score": twin["liquidity_stress_score"],
+            "risk_trajectory_curve": twin["risk_trajectory_curve"],
             "behavioral_drift_metrics": drift,
-            "survival_curve": [float(1.0 - p) for p in traj],
+            "survival_curve": twin["survival_curve"],
             "reasoning": "cashflow and affordability estimated",
         }
+
+
+def _distress(ratio, stress):
+    return np.clip(1.0 / (1.0 + np.exp(-3.0 * (ratio + 0.5 * stress - 0.6))), 0.0, 1.0)
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(42)
+    n, horizon = 1_000_000, 12
+    income = rng.lognormal(8.3, 0.4, n)
+    emi = income * rng.uniform(0.1, 0.6, n)
+    F = income[:, None] * rng.uniform(0.2, 1.2, (n, 1)) * (1 + rng.normal(0, 0.1, (n, horizon)))
+    agent = DigitalTwinAgent(use_torch=False)
+    t0 = time.perf_counter()
+    batch = agent.assess_batch(F, income, emi)
+    dt_batch = time.perf_counter() - t0
+
+    def legacy(income, emi, forecast):
+        cf = float(np.mean(forecast))
+        ratio = emi / max(income, 1e-6)
+        stress = max(0.0, (emi - max(cf, 1e-6)) / max(income, 1e-6))
+        p = float(np.clip(1.0 / (1.0 + np.exp(-3.0 * (ratio + 0.5 * stress - 0.6))), 0.0, 1.0))
+        traj = []
+        for v in forecast:
+            s = max(0.0, (emi - max(float(v), 1e-6)) / max(income, 1e-6))
+            traj.append(float(np.clip(1.0 / (1.0 + np.exp(-3.0 * (ratio + 0.5 * s - 0.6))), 0.0, 1.0)))
+        return p, stress, traj, [1.0 - q for q in traj]
+
+    k = 5000
+    t0 = time.perf_counter()
+    ref = [legacy(income[i], emi[i], F[i]) for i in range(k)]
+    dt_scalar = (time.perf_counter() - t0) / k * n
+    err = max(max(abs(r[0] - batch["default_probability"][i]), np.abs(np.array(r[2]) - batch["risk_trajectory_curve"][i]).max())
+              for i, r in enumerate(ref))
+    print(f"{n} borrowers x {horizon}: batch kernel {dt_batch:.2f}s | scalar loop (extrapolated) {dt_scalar:.0f}s | "
+          f"{dt_scalar / dt_batch:.0f}x | max abs diff vs scalar {err:.1e}")
@@ -1,16 +1,252 @@
 import numpy as np
 
+AGE_EDGES = (25, 35, 45, 55, 65)
+BIAS_THRESHOLD = 0.8
+APPROVE_BELOW_PD = 0.2
+
+def age_bands(age_years, edges=AGE_EDGES):
+    labels = [f"<{edges[0]}"] + [f"{lo}-{hi - 1}" for lo, hi in zip(edges[:-1], edges[1:])] + [f"{edges[-1]}+"]
+    return np.asarray(labels)[np.digitize(np.asarray(age_years, dtype=float), edges)]
+
+def cohort_groups(df, by=("CODE_GENDER", "age_band")):
+    parts = []
+    for col in by:
+        if col == "age_band":
+            age = df["age_years"].to_numpy() if "age_years" in df.columns else df["DAYS_BIRTH"].to_numpy() / -365.25
+            parts.append(age_bands(age))
+        else:
+            parts.append(df[col].astype(str).to_numpy())
+    groups = parts[0].astype(str)
+    for p in parts[1:]:
+        groups = np.char.add(np.char.add(groups, "|"), p.astype(str))
+    return groups
+
+def fairness_index(pricing_gap, dp_gap=0.0, eo_diff=0.0, outcome_disparity=0.0):
+    return float(min(max(0.5 * (1.0 - pricing_gap) + 0.5 * (1.0 - max(dp_gap, eo_diff, outcome_disparity)), 0.0), 1.0))
+
+
+class CohortFairness:
+
+    def __init__(self):
+        self.groups = []
+        self._code = {}
+        self.n = np.zeros(0)
+        self.decided = np.zeros(0)
+        self.approved = np.zeros(0)
+        self.qualified = np.zeros(0)
+        self.tp = np.zeros(0)
+        self.rate_sum = np.zeros(0)
+        self.outcome_sum = np.zeros(0)
+        self.outcome_n = np.zeros(0)
+        self._metrics = None
+
+    def __len__(self):
+        return int(self.n.sum())
+
+    def _codes(self, groups):
+        names, inv = np.unique(np.asarray(groups).astype(str), return_inverse=True)
+        new = [g for g in names if g not in self._code]
+        if new:
+            for g in new:
+                self._code[g] = len(self.groups)
+                self.groups.append(g)
+            pad = len(new)
+            for name in ("n", "decided", "approved", "qualified", "tp", "rate_sum", "outcome_sum", "outcome_n"):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(pad)]))
+        return np.array([self._code[g] for g in names], dtype=np.int64)[inv.reshape(-1)]
+
+    def update(self, groups, approved, rates=None, qualified=None, outcomes=None, weight=1.0):
+        codes = self._codes(groups)
+        k = len(self.groups)
+        m = len(codes)
+        a = np.broadcast_to(np.asarray(approved, dtype=bool), (m,))
+        count = lambda w=None: weight * np.bincount(codes, weights=w, minlength=k)
+        self.n += count()
+        self.decided += count()
+        self.approved += count(a)
+        if qualified is not None:
+            q = np.broadcast_to(np.asarray(qualified, dtype=bool), (m,))
+            self.qualified += count(q)
+            self.tp += count(q & a)
+        if rates is not None:
+            self.rate_sum += count(np.where(a, np.broadcast_to(np.asarray(rates, dtype=float), (m,)), 0.0))
+        if outcomes is not None:
+            self.outcome_sum += count(np.broadcast_to(np.asarray(outcomes, dtype=float), (m,)))
+            self.outcome_n += count()
+        self._metrics = None
+        return self
+
+    def add(self, group, approved=True, rate=None, outcome=None, weight=1.0):
+        i = self._code.get(group)
+        if i is None:
+            i = int(self._codes([group])[0])
+        self.n[i] += weight
+        if approved is not None:
+            self.decided[i] += weight
+        if approved:
+            self.approved[i] += weight
+            if rate is not None:
+                self.rate_sum[i] += weight * rate
+        if outcome is not None:
+            self.outcome_sum[i] += weight * outcome
+            self.outcome_n[i] += weight
+        self._metrics = None
+        return self
+
+    def remove(self, groups, approved, rates=None, qualified=None, outcomes=None):
+        return self.update(groups, approved, rates=rates, qualified=qualified, outcomes=outcomes, weight=-1.0)
+
+    def _rates(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            approval_rate = self.approved / self.decided
+            tpr = self.tp / self.qualified
+            mean_rate = self.rate_sum / self.approved
+            outcome_rate = self.outcome_sum / self.outcome_n
+        return approval_rate, tpr, mean_rate, outcome_rate
+
+    def mean_rate(self, group=None):
+        i = self._code.get(str(group)) if group is not None else None
+        if i is not None and self.approved[i] > 0 and self.rate_sum[i] > 0:
+            return float(self.rate_sum[i] / self.approved[i])
+        approved = self.approved.sum()
+        return float(self.rate_sum.sum() / approved) if approved > 0 else 0.0
+
+    def gaps(self, min_n=0):
+        rates = np.stack(self._rates())
+        eligible = (self.n > 0) & (self.n >= min_n)
+        mask = np.stack([self.decided > 0, self.qualified > 0, (self.approved > 0) & (self.rate_sum > 0), self.outcome_n > 0]) & eligible
+        hi = np.where(mask, rates, -np.inf).max(axis=1, initial=-np.inf)
+        lo = np.where(mask, rates, np.inf).min(axis=1, initial=np.inf)
+        dp_gap, eo_diff, pricing_spread, outcome_disparity = np.where(mask.sum(axis=1) > 1, hi - lo, 0.0).tolist()
+        approved = self.approved.sum()
+        overall_rate = self.rate_sum.sum() / approved if approved > 0 else 0.0
+        outcome_n = self.outcome_n.sum()
+        overall_outcome = self.outcome_sum.sum() / outcome_n if outcome_n > 0 else 0.0
+        pricing_gap = float(pricing_spread / overall_rate) if overall_rate > 0 else 0.0
+        return {
+            "n": int(self.n.sum()),
+            "n_groups": int(eligible.sum()),
+            "demographic_parity_gap": dp_gap,
+            "disparate_impact": float(lo[0] / hi[0]) if mask[0].any() and hi[0] > 0 else 1.0,
+            "equal_opportunity_difference": eo_diff,
+            "outcome_disparity": outcome_disparity,
+            "pricing_gap": pricing_gap,
+            "relative_outcome_spread": float(outcome_disparity / overall_outcome) if overall_outcome > 0 else 0.0,
+            "fairness_index": fairness_index(pricing_gap, dp_gap, eo_diff, outcome_disparity),
+        }
+
+    def metrics(self):
+        if self._metrics is not None:
+            return self._metrics
+        approval_rate, tpr, mean_rate, outcome_rate = self._rates()
+        m = self.gaps()
+        m["groups"] = {
+            g: {
+                "n": int(self.n[i]),
+                "approval_rate": float(approval_rate[i]) if self.decided[i] > 0 else None,
+                "true_positive_rate": float(tpr[i]) if self.qualified[i] > 0 else None,
+                "mean_rate": float(mean_rate[i]) if self.approved[i] > 0 else None,
+                "outcome_rate": float(outcome_rate[i]) if self.outcome_n[i] > 0 else None,
+            }
+            for i, g in enumerate(self.groups) if self.n[i] > 0
+        }
+        self._metrics = m
+        return m
+
+    def copy(self):
+        cohort = CohortFairness()
+        cohort.groups = list(self.groups)
+        cohort._code = dict(self._code)
+        for name in ("n", "decided", "approved", "qualified", "tp", "rate_sum", "outcome_sum", "outcome_n"):
+            setattr(cohort, name, getattr(self, name).copy())
+        return cohort
+
+    @classmethod
+    def from_counts(cls, counts):
+        cohort = cls()
+        cohort._codes(list(counts))
+        for name in ("n", "decided", "approved", "qualified", "tp", "rate_sum", "outcome_sum", "outcome_n"):
+            getattr(cohort, name)[:] = [c.get(name, c.get("n", 0.0) if name == "decided" else 0.0) for c in (counts[g] for g in cohort.groups)]
+        return cohort
+
+    @classmethod
+    def from_frame(cls, df, by=("CODE_GENDER", "age_band"), decision_col=None, pd_col="PREDICTION", rate_col=None,
+                   target_col="TARGET", approve_below=APPROVE_BELOW_PD):
+        groups = cohort_groups(df, by)
+        pd_scores = df[pd_col].to_numpy(dtype=float) if pd_col in df.columns else None
+        if decision_col:
+            approved = df[decision_col].to_numpy().astype(bool)
+        elif pd_scores is not None:
+            approved = pd_scores < approve_below
+        else:
+            approved = np.ones(len(df), dtype=bool)
+        if rate_col:
+            rates = df[rate_col].to_numpy(dtype=float)
+        elif pd_scores is not None:
+            rates = np.clip(0.05 + 0.5 * pd_scores, 0.05, 0.15)
+        else:
+            rates = None
+        outcomes = df[target_col].to_numpy(dtype=float) if target_col in df.columns else None
+        qualified = outcomes == 0 if outcomes is not None else None
+        return cls().update(groups, approved, rates=rates, qualified=qualified, outcomes=outcomes)
+
+
 class FairnessAgent:
-    def assess(self, interest_rate, default_probability):
-        g = np.random.choice(["A", "B"])
-        base = interest_rate
-        rates = {"A": base * (0.98 + 0.02 * np.random.rand()), "B": base * (1.02 - 0.02 * np.random.rand())}
-        defaults = {"A": default_probability * (0.95 + 0.1 * np.random.rand()), "B": default_probability * (1.05 - 0.1 * np.random.rand())}
-        pricing_equality = 1.0 - abs(rates["A"] - rates["B"]) / max(base, 1e-6)
-        decision_disparity = abs(defaults["A"] - defaults["B"])
-        fairness_index = float(np.clip(0.5 * pricing_equality + 0.5 * (1.0 - decision_disparity), 0.0, 1.0))
-        score = float(fairness_index * 100.0)
-        bias_flag = bool(fairness_index < 0.8)
-        parity_gap = float(abs(rates["A"] - rates["B"]) / max(base, 1e-6))
-        outcome_disparity = float(decision_disparity)
-        return {"fairness_score": score, "bias_flag": bias_flag, "fairness_index": fairness_index, "demographic_parity_gap": parity_gap, "outcome_disparity": outcome_disparity}
+    def __init__(self, cohort=None, bias_threshold=BIAS_THRESHOLD, min_n=0):
+        self.cohort = cohort
+        self.bias_threshold = bias_threshold
+        self.min_n = min_n
+
+    def assess(self, interest_rate, default_probability, group=None):
+        if self.cohort is None or len(self.cohort) == 0:
+            return {"status": "no_cohort", "cohort_size": 0, "fairness_score": None, "bias_flag": None, "fairness_index": None,
+                    "demographic_parity_gap": None, "outcome_disparity": None, "equal_opportunity_difference": None,
+                    "pricing_gap": None, "offer_rate_gap": None}
+        m = self.cohort.gaps(self.min_n)
+        reference = self.cohort.mean_rate(group)
+        offer_gap = abs(float(interest_rate) - reference) / reference if reference > 0 else 0.0
+        outcome_disparity = float(default_probability * m["relative_outcome_spread"])
+        index = fairness_index(max(m["pricing_gap"], offer_gap), m["demographic_parity_gap"], m["equal_opportunity_difference"], outcome_disparity)
+        return {
+            "status": "ok",
+            "cohort_size": m["n"],
+            "fairness_score": float(index * 100.0),
+            "bias_flag": bool(index < self.bias_threshold),
+            "fairness_index": index,
+            "demographic_parity_gap": m["demographic_parity_gap"],
+            "outcome_disparity": outcome_disparity,
+            "equal_opportunity_difference": m["equal_opportunity_difference"],
+            "pricing_gap": m["pricing_gap"],
+            "offer_rate_gap": float(offer_gap),
+        }
+
+if __name__ == "__main__":
+    import time
+    import pandas as pd
+    rng = np.random.default_rng(42)
+    n = 1_000_000
+    df = pd.DataFrame({
+        "CODE_GENDER": rng.choice(["F", "M"], n, p=[0.65, 0.35]),
+        "DAYS_BIRTH": -rng.integers(21 * 365, 69 * 365, n),
+        "PREDICTION": rng.beta(2, 10, n),
+    })
+    df["TARGET"] = (rng.random(n) < df["PREDICTION"]).astype(int)
+    t0 = time.perf_counter()
+    cohort = CohortFairness.from_frame(df)
+    m = cohort.metrics()
+    dt = time.perf_counter() - t0
+    print(f"{n} decisions, {len(m['groups'])} cohorts in {dt * 1e3:.0f} ms | DP gap {m['demographic_parity_gap']:.4f} | "
+          f"EO diff {m['equal_opportunity_difference']:.4f} | outcome disparity {m['outcome_disparity']:.4f}")
+    groups = cohort_groups(df)
+    approved = df["PREDICTION"].to_numpy() < APPROVE_BELOW_PD
+    stream = CohortFairness()
+    t0 = time.perf_counter()
+    for s in range(0, n, 10_000):
+        stream.update(groups[s:s + 10_000], approved[s:s + 10_000], qualified=df["TARGET"].to_numpy()[s:s + 10_000] == 0,
+                      outcomes=df["TARGET"].to_numpy()[s:s + 10_000], rates=np.clip(0.05 + 0.5 * df["PREDICTION"].to_numpy()[s:s + 10_000], 0.05, 0.15))
+    dt = time.perf_counter() - t0
+    sm = stream.metrics()
+    print(f"streamed in 100 batches: {dt * 1e3:.0f} ms | DP gap {sm['demographic_parity_gap']:.4f} "
+          f"(batch {m['demographic_parity_gap']:.4f})")
+    print(FairnessAgent(cohort).assess(0.12, 0.1, group="F|25-34"))
+    print(FairnessAgent().assess(0.12, 0.1))
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from ..database.logger import subscribe
+from .fairness_agent import BIAS_THRESHOLD, CohortFairness
+
+logger = logging.getLogger(__name__)
+
+WINDOW = int(os.environ.get("AEGIS_FAIRNESS_WINDOW", "1000"))
+MAX_AGE = float(os.environ["AEGIS_FAIRNESS_MAX_AGE"]) if os.environ.get("AEGIS_FAIRNESS_MAX_AGE") else None
+THRESHOLD = float(os.environ.get("AEGIS_FAIRNESS_THRESHOLD", str(BIAS_THRESHOLD)))
+MAX_GAP = float(os.environ.get("AEGIS_FAIRNESS_MAX_GAP", "0.2"))
+MIN_GROUP_SIZE = int(os.environ.get("AEGIS_FAIRNESS_MIN_GROUP", "20"))
+UNKNOWN_GROUP = "unknown"
+
+_shared = None
+
+
+class FairnessMonitor:
+
+    def __init__(self, window=WINDOW, max_age=MAX_AGE, threshold=THRESHOLD, max_gap=MAX_GAP,
+                 min_group_size=MIN_GROUP_SIZE, on_alert=None, clock=time.time):
+        self.window = int(window)
+        self.max_age = max_age
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.min_group_size = min_group_size
+        self.on_alert = list(on_alert or [])
+        self.clock = clock
+        self.events = deque()
+        self.stats = CohortFairness()
+        self.alerts = deque(maxlen=100)
+        self.breached = False
+        self.n_seen = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.events)
+
+    def _apply(self, event, weight):
+        _, group, approved, rate, outcome = event
+        self.stats.add(group, approved, rate, outcome, weight)
+
+    def _evict(self, now):
+        while len(self.events) > self.window:
+            self._apply(self.events.popleft(), -1)
+        if self.max_age is not None:
+            while self.events and now - self.events[0][0] > self.max_age:
+                self._apply(self.events.popleft(), -1)
+
+    def _resync(self):
+        self.stats = CohortFairness()
+        for event in self.events:
+            self._apply(event, 1)
+
+    def record(self, group, approved=True, rate=None, outcome=None, ts=None):
+        with self.lock:
+            now = self.clock() if ts is None else ts
+            event = (now, str(group) if group is not None else UNKNOWN_GROUP, None if approved is None else bool(approved),
+                     float(rate) if rate is not None else None, float(outcome) if outcome is not None else None)
+            self.events.append(event)
+            self._apply(event, 1)
+            self.n_seen += 1
+            self._evict(now)
+            if self.n_seen % max(self.window, 1) == 0:
+                self._resync()
+            return self._check(now)
+
+    def observe(self, event):
+        contract = event.get("contract") or {}
+        group = event.get("group") or contract.get("group")
+        survival = event.get("survival_probability")
+        approved = event.get("approved")
+        return self.record(
+            group,
+            approved=contract.get("approved") if approved is None else approved,
+            rate=contract.get("interest_rate"),
+            outcome=1.0 - float(survival) if survival is not None else None,
+        )
+
+    def cohort(self):
+        with self.lock:
+            self._evict(self.clock())
+            return self.stats.copy()
+
+    def gaps(self):
+        return self.stats.gaps(max(self.min_group_size, 1))
+
+    def breaches(self, m):
+        if m["n_groups"] < 2:
+            return []
+        out = ["fairness_index"] if m["fairness_index"] < self.threshold else []
+        return out + [k for k in ("demographic_parity_gap", "outcome_disparity", "pricing_gap") if m[k] > self.max_gap]
+
+    def _check(self, now):
+        m = self.gaps()
+        breaches = self.breaches(m)
+        breached = bool(breaches)
+        alert = None
+        if breached and not self.breached:
+            alert = {
+                "ts": now,
+                "breaches": breaches,
+                "fairness_index": m["fairness_index"],
+                "demographic_parity_gap": m["demographic_parity_gap"],
+                "outcome_disparity": m["outcome_disparity"],
+                "pricing_gap": m["pricing_gap"],
+                "window_size": len(self.events),
+            }
+            self.alerts.append(alert)
+            logger.warning(f"fairness threshold crossed: {', '.join(breaches)} "
+                           f"(fairness_index={m['fairness_index']:.3f}, window={len(self.events)})")
+            for fn in self.on_alert:
+                fn(alert)
+        elif not breached and self.breached:
+            logger.info(f"fairness back within thresholds (fairness_index={m['fairness_index']:.3f})")
+        self.breached = breached
+        return alert
+
+    def snapshot(self):
+        with self.lock:
+            self._evict(self.clock())
+            gaps = self.gaps()
+            breaches = self.breaches(gaps)
+            m = self.stats.metrics()
+            return {
+                "window": self.window,
+                "max_age": self.max_age,
+                "window_size": len(self.events),
+                "events_seen": self.n_seen,
+                "threshold": self.threshold,
+                "max_gap": self.max_gap,
+                "alert": bool(breaches),
+                "breaches": breaches,
+                "eligible_groups": [g for g, st in m["groups"].items() if st["n"] >= self.min_group_size],
+                "gaps": gaps,
+                "metrics": m,
+                "recent_alerts": list(self.alerts),
+            }
+
+
+def shared_monitor():
+    global _shared
+    if _shared is None:
+        _shared = FairnessMonitor()
+        subscribe(_shared.observe)
+    return _shared
+
+
+if __name__ == "__main__":
+    import numpy as np
+    rng = np.random.default_rng(42)
+    monitor = FairnessMonitor(window=10_000)
+    n = 200_000
+    groups = rng.choice(["F|25-34", "M|25-34", "F|45-54", "M|45-54"], n)
+    rates = 0.10 + 0.02 * rng.random(n) + np.where(np.arange(n) > n // 2, 0.05 * (groups == "M|45-54"), 0.0)
+    t0 = time.perf_counter()
+    for g, r in zip(groups, rates):
+        monitor.record(g, rate=r, outcome=0.1)
+    dt = time.perf_counter() - t0
+    snap = monitor.snapshot()
+    print(f"{n} events in {dt:.2f}s ({dt / n * 1e6:.1f} us/event) | alerts {len(snap['recent_alerts'])} | "
+          f"pricing gap {snap['metrics']['pricing_gap']:.3f}")
@@ -1,8 +1,27 @@
+import os
+import threading
+import time
 import numpy as np
-from ..environment.financial_env import FinancialEnv
+from ..environment.financial_env import BatchFinancialEnv, action_matrix
+
+Q_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models", "meta_rl_q.npz"))
+SAVE_INTERVAL = float(os.environ["AEGIS_Q_SAVE_INTERVAL"]) if os.environ.get("AEGIS_Q_SAVE_INTERVAL") else 60.0
+
+ACTIONS = (
+    {"rate_delta": -0.01, "tenure_delta": 12, "grace_toggle": True, "collateral_adjust": -0.02},
+    {"rate_delta": 0.0, "tenure_delta": 6, "grace_toggle": False, "collateral_adjust": 0.0},
+    {"rate_delta": 0.01, "tenure_delta": -6, "grace_toggle": False, "collateral_adjust": 0.02},
+)
+ACTION_TABLE = action_matrix(ACTIONS)
+
+N_DP = 11
+N_EMI = 101
+
+_last_save = {}
+_save_lock = threading.Lock()
 
 class MetaRLAgent:
-    def __init__(self, use_sb3=True):
+    def __init__(self, use_sb3=True, q_path=Q_PATH, seed=None, save_interval=SAVE_INTERVAL):
         self.use_sb3 = use_sb3
         self.sb3 = None
         if use_sb3:
@@ -11,58 +30,197 @@ class MetaRLAgent:
                 self.sb3 = sb3
             except Exception:
                 self.use_sb3 = False
-        self.q = {}
+        self.q = np.zeros((N_DP, N_EMI, len(ACTIONS)))
         self.epsilon = 0.2
         self.gamma = 0.9
         self.alpha = 0.5
+        self.rng = np.random.default_rng(seed)
+        self.q_path = q_path
+        self.save_interval = save_interval
+        self.dirty = False
+        if q_path and os.path.exists(q_path):
+            self.load(q_path)
 
     def _s(self, state):
         dp = int(np.clip(state["default_probability"] * 10, 0, 10))
         emi = int(np.clip(state["emi_ratio"] * 100, 0, 100))
         return (dp, emi)
 
+    def _s_batch(self, default_probability, emi_ratio):
+        dp = np.clip(np.asarray(default_probability) * 10, 0, 10).astype(np.int64)
+        emi = np.clip(np.asarray(emi_ratio) * 100, 0, 100).astype(np.int64)
+        return dp, emi
+
     def _actions(self):
-        return [
-            {"rate_delta": -0.01, "tenure_delta": 12, "grace_toggle": True, "collateral_adjust": -0.02},
-            {"rate_delta": 0.0, "tenure_delta": 6, "grace_toggle": False, "collateral_adjust": 0.0},
-            {"rate_delta": 0.01, "tenure_delta": -6, "grace_toggle": False, "collateral_adjust": 0.02},
-        ]
+        return ACTIONS
 
     def _pick_action(self, s):
-        acts = self._actions()
-        if np.random.rand() < self.epsilon:
-            return acts[np.random.randint(len(acts))]
-        vals = [self.q.get((s, i), 0.0) for i in range(len(acts))]
-        return acts[int(np.argmax(vals))]
+        if self.rng.random() < self.epsilon:
+            return int(self.rng.integers(len(ACTIONS)))
+        return int(np.argmax(self.q[s]))
+
+    def select_actions(self, dp, emi, greedy=False):
+        a = np.argmax(self.q[dp, emi], axis=-1)
+        if greedy or self.epsilon <= 0:
+            return a
+        explore = self.rng.random(len(a)) < self.epsilon
+        return np.where(explore, self.rng.integers(len(ACTIONS), size=len(a)), a)
+
+    def update(self, s, a, reward, s2):
+        qmax = self.q[s2].max()
+        self.q[s + (a,)] = (1 - self.alpha) * self.q[s + (a,)] + self.alpha * (reward + self.gamma * qmax)
+        self.dirty = True
+
+    def update_batch(self, dp, emi, a, reward, dp2, emi2):
+        target = reward + self.gamma * self.q[dp2, emi2].max(axis=-1)
+        flat = np.ravel_multi_index((dp, emi, a), self.q.shape)
+        uniq, inv = np.unique(flat, return_inverse=True)
+        mean_target = np.bincount(inv, weights=target) / np.bincount(inv)
+        qf = self.q.reshape(-1)
+        qf[uniq] = (1 - self.alpha) * qf[uniq] + self.alpha * mean_target
+        self.dirty = True
 
-    def negotiate(self, env, bank_agent, customer_agent, risk_agent, fairness_agent, compliance_agent, initial_offer, rounds=7):
+    def save(self, path=None):
+        path = path or self.q_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, q=self.q, alpha=self.alpha, gamma=self.gamma, epsilon=self.epsilon)
+        os.replace(tmp, path)
+        self.dirty = False
+
+    def maybe_save(self, now=None):
+        if not self.dirty or not self.q_path or self.save_interval is None or self.save_interval < 0:
+            return False
+        now = time.monotonic() if now is None else now
+        with _save_lock:
+            last = _last_save.get(self.q_path)
+            if last is not None and now - last < self.save_interval:
+                return False
+            _last_save[self.q_path] = now
+        self.save()
+        return True
+
+    def load(self, path=None):
+        data = np.load(path or self.q_path)
+        if data["q"].shape == self.q.shape:
+            self.q = data["q"].astype(float)
+        return self
+
+    def pretrain(self, n_borrowers=100_000, rounds=7, fairness_index=1.0, weights=None, seed=42):
+        rng = np.random.default_rng(seed)
+        env = BatchFinancialEnv(n_borrowers, weights)
+        emi_ratio = rng.beta(2, 5, n_borrowers)
+        exposure = rng.lognormal(10, 0.5, n_borrowers)
+        dp = 1.0 / (1.0 + np.exp(-3.0 * (emi_ratio + 0.5 * rng.beta(1, 5, n_borrowers) - 0.6)))
+        env.reset(dp, emi_ratio, exposure, fairness_index=fairness_index)
+        for t in range(rounds):
+            s_dp, s_emi = self._s_batch(env.default_probability, env.emi_ratio)
+            a = self.select_actions(s_dp, s_emi)
+            reward = env.step(ACTION_TABLE[a])
+            env.default_probability[:] = 1.0 / (1.0 + np.exp(-3.0 * (env.emi_ratio - 0.6)))
+            s2_dp, s2_emi = self._s_batch(env.default_probability, env.emi_ratio)
+            self.update_batch(s_dp, s_emi, a, reward, s2_dp, s2_emi)
+        return self
+
+    def negotiate(self, env, bank_agent, customer_agent, risk_agent, fairness_agent, compliance_agent, initial_offer, rounds=7,
+                  early_stop=False, contract_tol=1e-6, reward_tol=1e-3, patience=2, cycle_window=6, time_budget=None):
         history = []
         contract = dict(initial_offer)
+        risk = None
+        forecast_key = None
+        comp_key = None
+        best = None
+        stable = 0
+        seen = {}
+        stop_reason = "budget"
+        t0 = time.perf_counter()
         for t in range(rounds):
             state = env.observe()
-            risk = risk_agent.analyze(state["cashflow_forecast"])
+            key = tuple(state["cashflow_forecast"])
+            if key != forecast_key:
+                risk = risk_agent.analyze(state["cashflow_forecast"])
+                forecast_key = key
             bank = bank_agent.offer(risk["risk_heatmap"], state["bank_exposure"], 0.0)
             cust = customer_agent.counter_offer(bank["offer"], state)
             rate = cust["counter_offer"]["interest_rate"]
             fairness = fairness_agent.assess(rate, state["default_probability"])
             metrics = {
                 "compliance_score": 100.0,
-                "fairness_index": fairness["fairness_index"],
                 "customer_survival": 1.0 - state["default_probability"],
             }
+            if fairness["fairness_index"] is not None:
+                metrics["fairness_index"] = fairness["fairness_index"]
             s = self._s(state)
-            a = self._pick_action(s)
+            idx = self._pick_action(s)
+            a = ACTIONS[idx]
             next_state, reward, details = env.step(a, metrics)
             dp_new = float(1.0 / (1.0 + np.exp(-3.0 * (next_state["emi_ratio"] - 0.6))))
             env.state["default_probability"] = dp_new
             s2 = self._s(next_state)
-            acts = self._actions()
-            qmax = max(self.q.get((s2, i), 0.0) for i in range(len(acts)))
-            idx = acts.index(a)
-            self.q[(s, idx)] = (1 - self.alpha) * self.q.get((s, idx), 0.0) + self.alpha * (reward + self.gamma * qmax)
+            self.update(s, idx, reward, s2)
+            prev = dict(contract)
             contract.update(cust["counter_offer"])
-            comp = compliance_agent.validate(contract)
+            ckey = _contract_key(contract)
+            if ckey != comp_key:
+                comp = compliance_agent.validate(contract)
+                comp_key = ckey
             metrics["compliance_score"] = comp["compliance_score"]
             history.append({"round": t + 1, "reward": reward, "bank_offer": bank["offer"], "customer_counter": cust["counter_offer"]})
+            if best is None or reward > best[1]:
+                best = (dict(contract), reward, t + 1)
+            if not early_stop:
+                continue
+            delta = _contract_delta(prev, contract)
+            if len(history) > 1:
+                last = history[-2]["reward"]
+                if delta <= contract_tol and abs(reward - last) <= reward_tol * max(1.0, abs(last)):
+                    stable += 1
+                else:
+                    stable = 0
+            if stable >= patience:
+                stop_reason = "converged"
+                break
+            if delta > contract_tol and ckey in seen and t + 1 - seen[ckey] <= cycle_window:
+                stop_reason = "cycle"
+                break
+            seen[ckey] = t + 1
+            if time_budget is not None and time.perf_counter() - t0 > time_budget:
+                stop_reason = "time_budget"
+                break
         convergence = [h["reward"] for h in history]
-        return {"final_contract": contract, "reward_curve": convergence, "transcript": history}
+        self.maybe_save()
+        return {
+            "final_contract": contract,
+            "reward_curve": convergence,
+            "transcript": history,
+            "best_contract": best[0] if best else contract,
+            "best_reward": best[1] if best else None,
+            "best_round": best[2] if best else 0,
+            "rounds_run": len(history),
+            "rounds_saved": rounds - len(history),
+            "converged": stop_reason == "converged",
+            "stop_reason": stop_reason,
+        }
+
+def _contract_key(contract):
+    return tuple(sorted((k, round(float(v), 6) if isinstance(v, (int, float)) else v) for k, v in contract.items()))
+
+def _contract_delta(a, b):
+    delta = 0.0
+    for k in set(a) | set(b):
+        va, vb = a.get(k), b.get(k)
+        if isinstance(va, (int, float)) and isinstance(vb, (int, float)):
+            delta = max(delta, abs(float(va) - float(vb)))
+        elif va != vb:
+            return float("inf")
+    return delta
+
+if __name__ == "__main__":
+    agent = MetaRLAgent(use_sb3=False, q_path=None, seed=42)
+    t0 = time.perf_counter()
+    agent.pretrain()
+    print(f"pretrained on 100000 synthetic borrowers in {time.perf_counter() - t0:.2f}s, "
+          f"{int((agent.q != 0).any(axis=-1).sum())} states visited")
+    agent.save(Q_PATH)
+    print(f"saved Q table to {Q_PATH}")
@@ -1,31 +1,77 @@
 import numpy as np
 
+BATCH_KEYS = ("p30", "p60", "p90", "cashflow_slope", "payment_volatility", "structural_break",
+              "early_intervention_score", "payment_delay_trend", "credit_dependency_growth")
+
 class RiskIntelligenceAgent:
     def analyze(self, cashflow_forecast):
         x = np.array(cashflow_forecast, dtype=float)
         if len(x) < 3:
             x = np.pad(x, (0, max(0, 3 - len(x))), constant_values=np.mean(x) if len(x) else 0.0)
-        slope = float(np.polyfit(np.arange(len(x)), x, 1)[0])
-        vol = float(np.std(x))
-        diffs = np.diff(x)
-        brk = float(np.max(np.abs(diffs)) / (np.std(diffs) + 1e-6))
-        base_p = lambda h: float(np.clip(0.5 - 0.8 * slope / (np.mean(x) + 1e-6) + 0.3 * vol / (np.mean(x) + 1e-6), 0.0, 1.0))
-        p30 = base_p(30)
-        p60 = float(np.clip(p30 + 0.1 * brk, 0.0, 1.0))
-        p90 = float(np.clip(p60 + 0.1 * brk, 0.0, 1.0))
-        heatmap = {
-            "distress_probabilities": {"30d": p30, "60d": p60, "90d": p90},
+        return self.row(self.analyze_batch(x[None, :]), 0)
+
+    def analyze_batch(self, forecasts):
+        X = np.asarray(forecasts, dtype=float)
+        if X.ndim == 1:
+            X = X[None, :]
+        n, h = X.shape
+        if h < 3:
+            fill = X.mean(axis=1, keepdims=True) if h else np.zeros((n, 1))
+            X = np.concatenate([X, np.broadcast_to(fill, (n, 3 - h))], axis=1)
+            h = 3
+        t = np.arange(h, dtype=float)
+        tc = t - t.mean()
+        mean = X.mean(axis=1)
+        slope = (X * tc).sum(axis=1) / (tc @ tc)
+        vol = X.std(axis=1)
+        diffs = np.diff(X, axis=1)
+        brk = np.abs(diffs).max(axis=1) / (diffs.std(axis=1) + 1e-6)
+        p30 = np.clip(0.5 - 0.8 * slope / (mean + 1e-6) + 0.3 * vol / (mean + 1e-6), 0.0, 1.0)
+        p60 = np.clip(p30 + 0.1 * brk, 0.0, 1.0)
+        p90 = np.clip(p60 + 0.1 * brk, 0.0, 1.0)
+        abs_mean = np.abs(mean) + 1e-6
+        return {
+            "p30": p30,
+            "p60": p60,
+            "p90": p90,
             "cashflow_slope": slope,
             "payment_volatility": vol,
             "structural_break": brk,
+            "early_intervention_score": np.clip(1.0 - p30, 0.0, 1.0),
+            "payment_delay_trend": np.clip((diffs < 0).mean(axis=1), 0.0, 1.0),
+            "credit_dependency_growth": np.clip(-slope / abs_mean + vol / abs_mean, 0.0, 1.0),
+        }
+
+    def row(self, batch, i):
+        heatmap = {
+            "distress_probabilities": {"30d": float(batch["p30"][i]), "60d": float(batch["p60"][i]), "90d": float(batch["p90"][i])},
+            "cashflow_slope": float(batch["cashflow_slope"][i]),
+            "payment_volatility": float(batch["payment_volatility"][i]),
+            "structural_break": float(batch["structural_break"][i]),
         }
-        intervention_window = float(np.clip(1.0 - p30, 0.0, 1.0))
-        neg_seq = float(np.mean(diffs < 0)) if len(diffs) else 0.0
-        delay_trend = float(np.clip(neg_seq, 0.0, 1.0))
-        dep_growth = float(np.clip((-slope) / (abs(np.mean(x)) + 1e-6) + vol / (abs(np.mean(x)) + 1e-6), 0.0, 1.0))
         return {
             "risk_heatmap": heatmap,
-            "early_intervention_score": intervention_window,
-            "payment_delay_trend": delay_trend,
-            "credit_dependency_growth": dep_growth,
+            "early_intervention_score": float(batch["early_intervention_score"][i]),
+            "payment_delay_trend": float(batch["payment_delay_trend"][i]),
+            "credit_dependency_growth": float(batch["credit_dependency_growth"][i]),
         }
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(42)
+    n, horizon = 1_000_000, 12
+    X = rng.lognormal(8, 0.3, (n, 1)) * (1 + np.cumsum(rng.normal(0, 0.05, (n, horizon)), axis=1))
+    agent = RiskIntelligenceAgent()
+    t0 = time.perf_counter()
+    batch = agent.analyze_batch(X)
+    dt_batch = time.perf_counter() - t0
+    k = 2000
+    t0 = time.perf_counter()
+    slopes = [float(np.polyfit(np.arange(horizon), X[i], 1)[0]) for i in range(k)]
+    dt_scalar = (time.perf_counter() - t0) / k * n
+    err = np.max(np.abs(np.array(slopes) - batch["cashflow_slope"][:k]) / (np.abs(slopes) + 1e-9))
+    rows = [agent.analyze(X[i]) for i in range(100)]
+    same = all(agent.row(batch, i) == rows[i] for i in range(100))
+    print(f"{n} borrowers x {horizon}: batch {dt_batch:.2f}s | polyfit scalar path (extrapolated) {dt_scalar:.0f}s | "
+          f"{dt_scalar / dt_batch:.0f}x | max slope rel err vs polyfit {err:.1e} | rows match scalar: {same}")
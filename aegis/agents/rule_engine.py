@@ -0,0 +1,138 @@
+import numpy as np
+
+POLICY_RULES = [
+    {"id": "apr_disclosure", "type": "required", "fields": ["apr", "interest_rate"], "penalty": 10.0,
+     "violation": "missing apr", "amendment": "add APR disclosure clause"},
+    {"id": "grace_terms", "type": "required", "fields": ["grace_period"], "penalty": 10.0,
+     "violation": "missing grace", "amendment": "define grace period conditions"},
+    {"id": "collateral_terms", "type": "required", "fields": ["collateral_change", "collateral_consent"], "penalty": 10.0,
+     "violation": "missing collateral", "amendment": "include collateral change consent section"},
+    {"id": "tenure_terms", "type": "required", "fields": ["tenure_months"], "penalty": 10.0,
+     "violation": "missing tenure", "amendment": "state maximum tenure and policy reference"},
+    {"id": "rate_cap", "type": "max", "field": "interest_rate", "limit": 0.20, "penalty": 8.0,
+     "violation": "interest rate cap exceeded", "amendment": "add APR disclosure clause"},
+    {"id": "tenure_max", "type": "max", "field": "tenure_months", "limit": 360, "penalty": 6.0,
+     "violation": "tenure exceeds policy maximum", "amendment": "state maximum tenure and policy reference"},
+    {"id": "collateral_consent", "type": "requires_if", "when": "collateral_change", "field": "collateral_consent", "penalty": 5.0,
+     "violation": "collateral change without customer consent", "amendment": "include collateral change consent section"},
+    {"id": "grace_length", "type": "max", "field": "grace_months", "limit": 12, "penalty": 4.0,
+     "violation": "grace period exceeds policy maximum", "amendment": "define grace period conditions"},
+]
+
+RULE_TYPES = ("required", "max", "min", "requires_if")
+
+
+class RuleEngine:
+
+    def __init__(self, rules=None):
+        self.rules = [dict(r) for r in (rules or POLICY_RULES)]
+        for r in self.rules:
+            if r["type"] not in RULE_TYPES:
+                raise ValueError(f"unknown rule type '{r['type']}' in rule '{r.get('id')}'")
+        self.fields = sorted({f for r in self.rules for f in r.get("fields", []) + [r.get("field"), r.get("when")] if f})
+        self.penalties = np.array([float(r.get("penalty", 0.0)) for r in self.rules])
+        self.violation_text = [r["violation"] for r in self.rules]
+        self.amendment_text = [r.get("amendment") for r in self.rules]
+        self.version = hash(tuple(tuple(sorted((k, str(v)) for k, v in r.items())) for r in self.rules))
+        self._predicates = [self._compile(r) for r in self.rules]
+
+    def _compile(self, r):
+        t = r["type"]
+        if t == "required":
+            fields = r["fields"]
+            return lambda cols: ~np.logical_or.reduce([cols[f][1] for f in fields])
+        if t == "max":
+            f, limit = r["field"], float(r["limit"])
+            return lambda cols: cols[f][1] & (cols[f][0] > limit)
+        if t == "min":
+            f, limit = r["field"], float(r["limit"])
+            return lambda cols: cols[f][1] & (cols[f][0] < limit)
+        when, f = r["when"], r["field"]
+        return lambda cols: cols[when][1] & (np.nan_to_num(cols[when][0]) != 0) & ~(cols[f][1] & (np.nan_to_num(cols[f][0]) != 0))
+
+    def columns(self, contracts):
+        n = len(contracts)
+        cols = {}
+        for f in self.fields:
+            vals = np.full(n, np.nan)
+            present = np.zeros(n, dtype=bool)
+            for i, c in enumerate(contracts):
+                v = c.get(f)
+                if v is None:
+                    continue
+                present[i] = True
+                try:
+                    vals[i] = float(v)
+                except (TypeError, ValueError):
+                    pass
+            cols[f] = (vals, present)
+        return cols
+
+    def table_columns(self, table):
+        cols = {}
+        n = None
+        for f in self.fields:
+            if f in table:
+                vals = np.asarray(table[f], dtype=float)
+                cols[f] = (vals, ~np.isnan(vals))
+                n = len(vals)
+        for f in self.fields:
+            if f not in cols:
+                cols[f] = (np.full(n or 0, np.nan), np.zeros(n or 0, dtype=bool))
+        return cols
+
+    def evaluate_columns(self, cols):
+        V = np.column_stack([p(cols) for p in self._predicates]) if self._predicates else None
+        scores = np.clip(100.0 - V @ self.penalties, 0.0, 100.0)
+        return scores, V
+
+    def evaluate_table(self, table):
+        return self.evaluate_columns(self.table_columns(table))
+
+    def results(self, scores, V):
+        out = []
+        for score, row in zip(scores, V):
+            hit = np.flatnonzero(row)
+            amendments = []
+            for j in hit:
+                a = self.amendment_text[j]
+                if a and a not in amendments:
+                    amendments.append(a)
+            out.append({
+                "compliance_score": float(score),
+                "violations": [self.violation_text[j] for j in hit],
+                "checks": len(self.rules),
+                "amendments": amendments,
+                "flags": {"kyc_flag": False, "aml_flag": False},
+                "reasoning": "structured rule engine",
+            })
+        return out
+
+    def check_many(self, contracts):
+        if not contracts:
+            return []
+        scores, V = self.evaluate_columns(self.columns(contracts))
+        return self.results(scores, V)
+
+    def check(self, contract):
+        return self.check_many([contract])[0]
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(42)
+    n = 1_000_000
+    table = {
+        "interest_rate": rng.uniform(0.05, 0.25, n),
+        "tenure_months": rng.integers(12, 420, n).astype(float),
+        "grace_period": (rng.random(n) < 0.5).astype(float),
+        "collateral_change": np.where(rng.random(n) < 0.3, rng.uniform(-0.1, 0.1, n), np.nan),
+        "collateral_consent": np.where(rng.random(n) < 0.5, 1.0, np.nan),
+    }
+    engine = RuleEngine()
+    engine.evaluate_table({k: v[:1000] for k, v in table.items()})
+    t0 = time.perf_counter()
+    scores, V = engine.evaluate_table(table)
+    dt = time.perf_counter() - t0
+    print(f"{n} contracts in {dt * 1e3:.1f} ms ({n / (dt * 1e3):.0f} contracts/ms), "
+          f"mean score {scores.mean():.2f}, violation rate {V.any(axis=1).mean():.3f}")
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+
+try:
+    import faiss
+except Exception:
+    faiss = None
+
+EMBED_MODEL = "sentence-transformers/paraphrase-MiniLM-L6-v2"
+INDEX_DIR = os.environ.get("AEGIS_RULE_INDEX", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models", "rule_index")))
+INDEX_FILE = "rules.faiss"
+MANIFEST_FILE = "manifest.json"
+FLAT_MAX = 2000
+
+_EMBEDDERS = {}
+
+def load_embedder(model=EMBED_MODEL):
+    if model not in _EMBEDDERS:
+        from sentence_transformers import SentenceTransformer
+        _EMBEDDERS[model] = SentenceTransformer(model)
+    return _EMBEDDERS[model]
+
+def encode(texts, model=EMBED_MODEL):
+    X = load_embedder(model).encode(list(texts), normalize_embeddings=True)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+def rules_digest(rules):
+    return hashlib.sha256("\n".join(rules).encode("utf-8")).hexdigest()
+
+def make_index(X, kind="auto", nlist=None, hnsw_m=32):
+    if faiss is None:
+        raise RuntimeError("faiss is not installed")
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    n, d = X.shape
+    if kind == "auto":
+        kind = "flat" if n <= FLAT_MAX else "hnsw"
+    params = {}
+    if kind == "flat":
+        index = faiss.IndexFlatIP(d)
+    elif kind == "ivf":
+        nlist = int(nlist or max(1, min(n // 39, 4 * int(np.sqrt(n)))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(d), d, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(X)
+        params = {"nlist": nlist}
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        params = {"hnsw_m": hnsw_m}
+    else:
+        raise ValueError(f"unknown index kind '{kind}'")
+    index.add(X)
+    return index, kind, params
+
+
+class RuleIndex:
+
+    def __init__(self, index, rules, model=EMBED_MODEL, kind="flat", nprobe=8, ef_search=64):
+        self.index = index
+        self.rules = list(rules)
+        self.model = model
+        self.kind = kind
+        self.digest = rules_digest(self.rules)
+        self._embedder = None
+        self.set_search_params(nprobe, ef_search)
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = load_embedder(self.model)
+        return self._embedder
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        if nprobe is not None and hasattr(self.index, "nprobe"):
+            self.index.nprobe = int(nprobe)
+        if ef_search is not None and hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = int(ef_search)
+
+    def matches(self, rules):
+        return self.digest == rules_digest(list(rules))
+
+    def search_vectors(self, Q, k=3):
+        k = min(k, len(self.rules))
+        return self.index.search(np.ascontiguousarray(Q, dtype=np.float32), k)
+
+    def search(self, texts, k=3):
+        Q = self.embedder.encode(list(texts), normalize_embeddings=True)
+        return self.search_vectors(Q, k)
+
+    @classmethod
+    def from_rules(cls, rules, kind="auto", model=EMBED_MODEL, embeddings=None, **kwargs):
+        X = encode(rules, model) if embeddings is None else embeddings
+        index, kind, _ = make_index(X, kind, **kwargs)
+        return cls(index, rules, model=model, kind=kind)
+
+    @classmethod
+    def load(cls, path=INDEX_DIR, mmap=True):
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        index_path = os.path.join(path, INDEX_FILE)
+        if faiss is None or not os.path.exists(manifest_path) or not os.path.exists(index_path):
+            return None
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        index = None
+        if mmap:
+            try:
+                index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except Exception:
+                index = None
+        if index is None:
+            index = faiss.read_index(index_path)
+        return cls(index, manifest["rules"], model=manifest["model"], kind=manifest["kind"], **manifest.get("search", {}))
+
+
+def build_index(rules, out_dir=INDEX_DIR, kind="auto", model=EMBED_MODEL, embeddings=None, nprobe=8, ef_search=64, **kwargs):
+    rules = list(rules)
+    X = encode(rules, model) if embeddings is None else np.ascontiguousarray(embeddings, dtype=np.float32)
+    index, kind, params = make_index(X, kind, **kwargs)
+    os.makedirs(out_dir, exist_ok=True)
+    faiss.write_index(index, os.path.join(out_dir, INDEX_FILE))
+    manifest = {
+        "model": model,
+        "dim": int(X.shape[1]),
+        "kind": kind,
+        "params": params,
+        "search": {"nprobe": nprobe, "ef_search": ef_search},
+        "n_rules": len(rules),
+        "digest": rules_digest(rules),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rules": rules,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return RuleIndex(index, rules, model=model, kind=kind, nprobe=nprobe, ef_search=ef_search)
+
+def synthetic_corpus(n_clauses=5000, seed=42):
+    rng = np.random.default_rng(seed)
+    subjects = ["APR disclosure", "Grace period terms", "Collateral changes", "Interest rate changes", "Tenure extensions",
+                "Prepayment penalties", "Late payment fees", "Restructuring offers", "Credit reporting", "Data sharing"]
+    verbs = ["must be", "shall be", "are required to be", "cannot be", "should be"]
+    objects = ["clearly disclosed to the borrower", "approved by the customer in writing", "capped by the regulator",
+               "reviewed by the compliance officer", "recorded in the loan agreement", "explained before signature",
+               "limited to the policy maximum", "reported within 30 days"]
+    scopes = ["for retail loans", "for SME facilities", "for secured lending", "for unsecured lending", "during hardship",
+              "after a rate reset", "for restructured accounts", "for new originations"]
+    return [f"{rng.choice(subjects)} {rng.choice(verbs)} {rng.choice(objects)} {rng.choice(scopes)} (clause {i})"
+            for i in range(n_clauses)]
+
+def benchmark(n_clauses=5000, n_queries=500, k=3, seed=42):
+    rng = np.random.default_rng(seed)
+    corpus = synthetic_corpus(n_clauses, seed)
+    try:
+        X = encode(corpus)
+        Q = encode(rng.choice(corpus, n_queries))
+        source = "embeddings"
+    except Exception:
+        d = 384
+        centers = rng.normal(size=(64, d))
+        X = centers[rng.integers(0, 64, n_clauses)] + 0.5 * rng.normal(size=(n_clauses, d))
+        Q = X[rng.integers(0, n_clauses, n_queries)] + 0.2 * rng.normal(size=(n_queries, d))
+        X = (X / np.linalg.norm(X, axis=1, keepdims=True)).astype(np.float32)
+        Q = (Q / np.linalg.norm(Q, axis=1, keepdims=True)).astype(np.float32)
+        source = "synthetic vectors"
+    faiss.omp_set_num_threads(1)
+    exact, _, _ = make_index(X, "flat")
+    t0 = time.perf_counter()
+    _, truth = exact.search(Q, k)
+    flat_us = (time.perf_counter() - t0) / n_queries * 1e6
+    print(f"{n_clauses} clauses, {n_queries} queries, recall@{k} ({source})")
+    print(f"  flat                 recall 1.000  {flat_us:8.1f} us/query")
+    rows = [("ivf", "nprobe", (1, 4, 16, 64)), ("hnsw", "ef_search", (16, 32, 64, 128))]
+    for kind, knob, values in rows:
+        t0 = time.perf_counter()
+        index, _, params = make_index(X, kind)
+        build_s = time.perf_counter() - t0
+        ri = RuleIndex(index, corpus, kind=kind)
+        for v in values:
+            ri.set_search_params(**{knob: v})
+            t0 = time.perf_counter()
+            _, I = ri.search_vectors(Q, k)
+            us = (time.perf_counter() - t0) / n_queries * 1e6
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(I, truth)])
+            print(f"  {kind:<4} {knob + '=' + str(v):<15} recall {recall:.3f}  {us:8.1f} us/query  (build {build_s:.2f}s)")
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if cmd == "build":
+        from aegis.agents.compliance_agent import DEFAULT_RULES
+        rules = DEFAULT_RULES
+        if len(sys.argv) > 2:
+            with open(sys.argv[2]) as f:
+                rules = [line.strip() for line in f if line.strip()]
+        kind = sys.argv[3] if len(sys.argv) > 3 else "auto"
+        ri = build_index(rules, kind=kind)
+        print(f"built {ri.kind} index over {len(rules)} rules in {INDEX_DIR}")
+    elif cmd == "bench":
+        for n in (1000, 5000, 20000):
+            benchmark(n_clauses=n)
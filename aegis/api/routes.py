@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Response, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Response, UploadFile, File, Form
 import requests
 from pydantic import BaseModel
 import numpy as np
 from ..demo import run_demo_scenario
+from ..agents.fairness_monitor import shared_monitor
+from ..math.contract_schedule import evaluate_contract
+from ..data.transaction_store import MAX_UPLOAD_BYTES, UploadTooLarge, aggregate_upload
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 import io
@@ -12,17 +15,24 @@ KEY = os.getenv("GROQ_API_KEY")
 
 router = APIRouter()
 
+fairness_monitor = shared_monitor()
+
 class SimulationRequest(BaseModel):
     income: float | None = None
     debt: float | None = None
     emi: float | None = None
     run_rounds: int | None = 7
     apply_shock: bool | None = False
+    group: str | None = None
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
 
+@router.get("/fairness/monitor")
+def fairness_monitor_status():
+    return fairness_monitor.snapshot()
+
 @router.post("/run_simulation")
 def run_simulation(req: SimulationRequest):
     from ..agents.digital_twin import DigitalTwinAgent
@@ -30,7 +40,7 @@ def run_simulation(req: SimulationRequest):
     from ..agents.bank_strategy import BankStrategyAgent
     from ..agents.negotiation_customer import CustomerNegotiationAgent
     from ..agents.compliance_agent import ComplianceAgent
-    from ..agents.fairness_agent import FairnessAgent
+    from ..agents.fairness_agent import APPROVE_BELOW_PD, FairnessAgent
     from ..agents.meta_rl_agent import MetaRLAgent
     from ..environment.financial_env import FinancialEnv
     from ..environment.shock_simulator import apply_shocks
@@ -53,13 +63,8 @@ def run_simulation(req: SimulationRequest):
             "inflation_pct": 0.03,
             "market_contraction_pct": 0.05,
         })
-        forecast = s_income.tolist()
-        twin["cashflow_forecast"] = forecast
-        p_default, liquidity_stress = dt.default_probability(income, debt * rate_mult, emi * rate_mult, forecast)
-        twin["default_probability"] = p_default
-        twin["liquidity_stress_score"] = liquidity_stress
-        twin["risk_trajectory_curve"] = dt._risk_trajectory(income, emi * rate_mult, forecast)
-        twin["survival_curve"] = [float(1.0 - p) for p in twin["risk_trajectory_curve"]]
+        twin["cashflow_forecast"] = s_income.tolist()
+        twin.update(dt.row(dt.assess_batch(s_income, income, emi * rate_mult), 0))
     env = FinancialEnv()
     env.reset({
         "default_probability": twin["default_probability"],
@@ -73,22 +78,22 @@ def run_simulation(req: SimulationRequest):
     bank = BankStrategyAgent()
     customer = CustomerNegotiationAgent()
     compliance = ComplianceAgent()
-    fairness = FairnessAgent()
+    fairness = FairnessAgent(fairness_monitor.cohort(), min_n=fairness_monitor.min_group_size)
     initial = {"interest_rate": 0.12, "tenure_months": 120, "grace_period": False, "restructure_pct": 0.0}
     rl = MetaRLAgent(use_sb3=False)
-    sim = rl.negotiate(env, bank, customer, risk, fairness, compliance, initial, rounds=rounds)
+    sim = rl.negotiate(env, bank, customer, risk, fairness, compliance, initial, rounds=rounds, early_stop=True)
     final = sim["final_contract"]
     comp = compliance.validate(final)
     risk_out = risk.analyze(twin["cashflow_forecast"])
-    fair_out = fairness.assess(final["interest_rate"], env.state["default_probability"])
+    fair_out = fairness.assess(final["interest_rate"], env.state["default_probability"], group=req.group)
     default_accuracy = float(1.0 - abs(twin["default_probability"] - risk_out["distress_probabilities"]["90d"]) if "distress_probabilities" in risk_out else 0.0)
     reward_curve = sim["reward_curve"]
     reward_improvement = float(reward_curve[-1] - reward_curve[0]) if reward_curve else 0.0
-    total_rules = len(compliance.rules) if hasattr(compliance, "rules") else 5
-    violations = len(comp.get("violations", []))
-    compliance_precision = float((total_rules - violations) / max(total_rules, 1))
-    initial_profit = float(initial["interest_rate"] * debt * initial["tenure_months"] / 12.0)
-    final_profit = float(final["interest_rate"] * debt * final["tenure_months"] / 12.0)
+    checks = comp["checks"]
+    violations = len(comp["violations"])
+    compliance_precision = float((checks - violations) / max(checks, 1))
+    initial_profit = evaluate_contract(initial, debt, twin["default_probability"])["el_adjusted_profit"]
+    final_profit = evaluate_contract(final, debt, env.state["default_probability"])["el_adjusted_profit"]
     profit_delta = float(final_profit - initial_profit)
     survival_delta = float((1.0 - env.state["default_probability"]) - (1.0 - twin["default_probability"]))
     log_metric(run_id, "default_prediction_accuracy", default_accuracy)
@@ -96,7 +101,8 @@ def run_simulation(req: SimulationRequest):
     log_metric(run_id, "compliance_detection_precision", compliance_precision)
     log_metric(run_id, "profit_delta", profit_delta)
     log_metric(run_id, "survival_probability_delta", survival_delta)
-    log_contract(run_id, final, comp["compliance_score"], final_profit, 1.0 - env.state["default_probability"])
+    log_contract(run_id, final, comp["compliance_score"], final_profit, 1.0 - env.state["default_probability"], group=req.group,
+                 approved=env.state["default_probability"] < APPROVE_BELOW_PD)
     return {
         "digital_twin": twin,
         "risk": risk_out,
@@ -107,6 +113,13 @@ def run_simulation(req: SimulationRequest):
         "final_contract": final,
         "compliance": comp,
         "fairness": fair_out,
+        "negotiation": {
+            "rounds_run": sim["rounds_run"],
+            "rounds_saved": sim["rounds_saved"],
+            "stop_reason": sim["stop_reason"],
+            "converged": sim["converged"],
+            "best_round": sim["best_round"],
+        },
         "metrics": {
             "default_prediction_accuracy": default_accuracy,
             "reward_improvement": reward_improvement,
@@ -116,6 +129,41 @@ def run_simulation(req: SimulationRequest):
         },
     }
 
+class StressRequest(BaseModel):
+    income: float | None = None
+    debt: float | None = None
+    emi: float | None = None
+    cashflow_forecast: list[float] | None = None
+    n_scenarios: int | None = None
+    seed: int | None = None
+    scenario: dict | None = None
+    correlation: list[list[float]] | None = None
+    sampler: str | None = None
+    control_variates: bool | None = False
+
+@router.post("/stress_test")
+def stress_test(req: StressRequest):
+    from ..agents.digital_twin import DigitalTwinAgent
+    from ..environment.stress_engine import StressEngine, N_SCENARIOS, MAX_SCENARIOS
+    income = float(req.income or 5000.0)
+    debt = float(req.debt or 20000.0)
+    emi = float(req.emi or 800.0)
+    n_scenarios = int(req.n_scenarios or N_SCENARIOS)
+    if not 1 <= n_scenarios <= MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"n_scenarios must be between 1 and {MAX_SCENARIOS}")
+    dt = DigitalTwinAgent(use_torch=False)
+    forecast = req.cashflow_forecast
+    if not forecast:
+        csv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "uploads", "sample_transactions.csv"))
+        forecast = dt.build(csv_path, income, debt, emi)["cashflow_forecast"]
+    try:
+        engine = StressEngine(req.scenario, req.correlation, n_scenarios, seed=req.seed, twin=dt,
+                              sampler=req.sampler, control_variates=bool(req.control_variates))
+        result = engine.run(np.asarray(forecast, dtype=float), income, emi, debt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"cashflow_forecast": list(forecast), **engine.summary(result)}
+
 class PdfRequest(BaseModel):
     interest_rate: float
     tenure_months: int
@@ -203,27 +251,35 @@ async def upload_csv(
     income: float = Form(5000.0),
     debt: float = Form(20000.0),
     emi: float = Form(800.0),
+    group: str | None = Form(None),
+    customer_id: str | None = Form(None),
 ):
     from ..agents.digital_twin import DigitalTwinAgent
     from ..agents.risk_agent import RiskIntelligenceAgent
     from ..agents.bank_strategy import BankStrategyAgent
     from ..agents.negotiation_customer import CustomerNegotiationAgent
     from ..agents.compliance_agent import ComplianceAgent
-    from ..agents.fairness_agent import FairnessAgent
+    from ..agents.fairness_agent import APPROVE_BELOW_PD, FairnessAgent
     from ..agents.meta_rl_agent import MetaRLAgent
     from ..environment.financial_env import FinancialEnv
     from ..database.logger import init_db, new_run, log_metric, log_contract
 
-    tmp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "uploads"))
-    os.makedirs(tmp_dir, exist_ok=True)
-    tmp_path = os.path.join(tmp_dir, file.filename)
-    with open(tmp_path, "wb") as f:
-        f.write(await file.read())
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"upload exceeds {MAX_UPLOAD_BYTES} bytes")
+    try:
+        monthly = await aggregate_upload(file)
+        if monthly.n_missing:
+            raise ValueError(f"{monthly.n_missing} rows have no customer id")
+        series = monthly.series(customer_id)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"could not read transactions: {e}")
 
     init_db()
     run_id = new_run(income, debt, emi, 7)
     dt = DigitalTwinAgent(use_torch=False)
-    twin = dt.build(tmp_path, income, debt, emi)
+    twin = dt.build_series(series, income, debt, emi)
 
     env = FinancialEnv()
     env.reset({
@@ -238,22 +294,22 @@ async def upload_csv(
     bank = BankStrategyAgent()
     customer = CustomerNegotiationAgent()
     compliance = ComplianceAgent()
-    fairness = FairnessAgent()
+    fairness = FairnessAgent(fairness_monitor.cohort(), min_n=fairness_monitor.min_group_size)
     initial = {"interest_rate": 0.12, "tenure_months": 120, "grace_period": False, "restructure_pct": 0.0}
     rl = MetaRLAgent(use_sb3=False)
     sim = rl.negotiate(env, bank, customer, risk, fairness, compliance, initial, rounds=7)
     final = sim["final_contract"]
     comp = compliance.validate(final)
     risk_out = risk.analyze(twin["cashflow_forecast"])
-    fair_out = fairness.assess(final["interest_rate"], env.state["default_probability"])
+    fair_out = fairness.assess(final["interest_rate"], env.state["default_probability"], group=group)
     default_accuracy = float(1.0 - abs(twin["default_probability"] - risk_out["distress_probabilities"]["90d"]) if "distress_probabilities" in risk_out else 0.0)
     reward_curve = sim["reward_curve"]
     reward_improvement = float(reward_curve[-1] - reward_curve[0]) if reward_curve else 0.0
-    total_rules = len(compliance.rules) if hasattr(compliance, "rules") else 5
-    violations = len(comp.get("violations", []))
-    compliance_precision = float((total_rules - violations) / max(total_rules, 1))
-    initial_profit = float(initial["interest_rate"] * debt * initial["tenure_months"] / 12.0)
-    final_profit = float(final["interest_rate"] * debt * final["tenure_months"] / 12.0)
+    checks = comp["checks"]
+    violations = len(comp["violations"])
+    compliance_precision = float((checks - violations) / max(checks, 1))
+    initial_profit = evaluate_contract(initial, debt, twin["default_probability"])["el_adjusted_profit"]
+    final_profit = evaluate_contract(final, debt, env.state["default_probability"])["el_adjusted_profit"]
     profit_delta = float(final_profit - initial_profit)
     survival_delta = float((1.0 - env.state["default_probability"]) - (1.0 - twin["default_probability"]))
     log_metric(run_id, "default_prediction_accuracy", default_accuracy)
@@ -261,7 +317,8 @@ async def upload_csv(
     log_metric(run_id, "compliance_detection_precision", compliance_precision)
     log_metric(run_id, "profit_delta", profit_delta)
     log_metric(run_id, "survival_probability_delta", survival_delta)
-    log_contract(run_id, final, comp["compliance_score"], final_profit, 1.0 - env.state["default_probability"])
+    log_contract(run_id, final, comp["compliance_score"], final_profit, 1.0 - env.state["default_probability"], group=group,
+                 approved=env.state["default_probability"] < APPROVE_BELOW_PD)
 
     return {
         "digital_twin": twin,
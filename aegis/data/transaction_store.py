@@ -0,0 +1,331 @@
+import csv
+import hashlib
+import io
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+CUSTOMER_COLUMNS = ("customer_id", "customer", "account_id", "SK_ID_CURR", "SME_ID")
+CACHE_SIZE = int(os.environ.get("AEGIS_TX_CACHE_SIZE", "256"))
+MAX_UPLOAD_BYTES = int(float(os.environ.get("AEGIS_MAX_UPLOAD_MB", "25")) * 1024 * 1024)
+CHUNK_SIZE = 1 << 20
+MAX_SERIES_ROWS = int(os.environ.get("AEGIS_MAX_SERIES_ROWS", "1200"))
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def customer_key(c):
+    if c is None or isinstance(c, float) and np.isnan(c):
+        return ""
+    if isinstance(c, float) and c.is_integer():
+        c = int(c)
+    return str(c).strip()
+
+
+def factorize_customers(customer):
+    codes, uniques = pd.factorize(np.asarray(customer))
+    names, inv = np.unique(np.array([customer_key(c) for c in uniques], dtype=object), return_inverse=True)
+    blank = names == ""
+    remap = np.where(blank, -1, np.cumsum(~blank) - 1)[inv.reshape(-1)]
+    codes = np.where(codes >= 0, remap[codes], -1) if len(remap) else codes
+    return codes, names[~blank]
+
+
+class MonthlySeries:
+
+    def __init__(self, values, mask, months=None, customers=None, n_missing=0):
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.mask = np.ascontiguousarray(mask, dtype=bool)
+        self.months = np.asarray(months if months is not None else np.arange(self.values.shape[1]), dtype=np.int64)
+        self.customers = np.asarray(customers if customers is not None else [None], dtype=object)
+        self._index = {c: i for i, c in enumerate(self.customers)}
+        self._index.update({str(c): i for i, c in enumerate(self.customers) if c is not None})
+        self.n_missing = int(n_missing)
+
+    def __len__(self):
+        return len(self.customers)
+
+    def row(self, customer=None):
+        if customer is None:
+            if len(self.customers) != 1:
+                raise KeyError("file holds several customers, pass one of them")
+            return 0
+        i = self._index.get(customer, self._index.get(str(customer)))
+        if i is None:
+            raise KeyError(f"unknown customer {customer!r}")
+        return i
+
+    def series(self, customer=None):
+        i = self.row(customer)
+        return self.values[i, self.mask[i]]
+
+    def padded(self):
+        order = np.argsort(~self.mask, axis=1, kind="stable")
+        lengths = self.mask.sum(axis=1)
+        X = np.take_along_axis(self.values, order, axis=1)
+        return np.where(np.arange(X.shape[1]) < lengths[:, None], X, 0.0), lengths
+
+    def month_labels(self):
+        return [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in self.months]
+
+    @classmethod
+    def from_arrays(cls, month_index, amount, customer=None):
+        amount = np.asarray(amount, dtype=float)
+        month_index = np.asarray(month_index, dtype=np.int64)
+        n_missing = 0
+        if customer is None:
+            codes, customers = np.zeros(len(amount), dtype=np.int64), np.array([None], dtype=object)
+        else:
+            codes, customers = factorize_customers(customer)
+            keep = codes >= 0
+            n_missing = len(codes) - int(keep.sum())
+            if n_missing:
+                codes, month_index, amount = codes[keep], month_index[keep], amount[keep]
+        if len(amount) == 0:
+            return cls(np.zeros((len(customers), 0)), np.zeros((len(customers), 0), dtype=bool), [], customers, n_missing)
+        m0 = int(month_index.min())
+        n_m = int(month_index.max()) - m0 + 1
+        n_c = len(customers)
+        flat = codes * n_m + (month_index - m0)
+        values = np.bincount(flat, weights=amount, minlength=n_c * n_m).reshape(n_c, n_m)
+        mask = np.bincount(flat, minlength=n_c * n_m).reshape(n_c, n_m) > 0
+        return cls(values, mask, m0 + np.arange(n_m), customers, n_missing)
+
+    @classmethod
+    def from_frame(cls, df):
+        if "date" in df.columns and "amount" in df.columns:
+            dates = pd.to_datetime(df["date"])
+            month_index = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+            customer_col = next((c for c in CUSTOMER_COLUMNS if c in df.columns), None)
+            customer = df[customer_col].to_numpy() if customer_col else None
+            return cls.from_arrays(month_index, df["amount"].astype(float).to_numpy(), customer)
+        values = df.iloc[:, -1].astype(float).to_numpy()
+        return cls(values[None, :], np.ones((1, len(values)), dtype=bool))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.from_frame(pd.read_csv(io.BytesIO(data), dtype={c: str for c in CUSTOMER_COLUMNS}))
+
+
+class MonthlyAggregator:
+
+    def __init__(self, max_bytes=MAX_UPLOAD_BYTES, max_series_rows=MAX_SERIES_ROWS):
+        self.max_bytes = max_bytes
+        self.max_series_rows = max_series_rows
+        self.n_bytes = 0
+        self.n_rows = 0
+        self.hash = hashlib.sha256()
+        self.buffer = b""
+        self.columns = None
+        self.customer_col = None
+        self.customer_codes = {}
+        self.n_missing = 0
+        self.m0 = None
+        self.sums = np.zeros((0, 0))
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self.values = []
+
+    def feed(self, chunk):
+        self.n_bytes += len(chunk)
+        if self.max_bytes and self.n_bytes > self.max_bytes:
+            raise UploadTooLarge(f"upload exceeds {self.max_bytes} bytes")
+        self.hash.update(chunk)
+        data = self.buffer + chunk
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self.buffer = data
+            return
+        self.buffer = data[cut + 1:]
+        self._consume(data[:cut + 1])
+
+    def _consume(self, data):
+        if self.columns is None:
+            nl = data.find(b"\n")
+            header, data = (data, b"") if nl < 0 else (data[:nl], data[nl + 1:])
+            self.columns = next(csv.reader([header.decode("utf-8-sig").strip()]))
+            self.customer_col = next((c for c in CUSTOMER_COLUMNS if c in self.columns), None)
+        if not data.strip():
+            return
+        dtype = {self.customer_col: str} if self.customer_col else None
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.columns, dtype=dtype)
+        self.n_rows += len(df)
+        if "date" not in self.columns or "amount" not in self.columns:
+            if self.max_series_rows and self.n_rows > self.max_series_rows:
+                raise UploadTooLarge(f"uploads without date and amount columns are limited to {self.max_series_rows} rows")
+            self.values.append(df.iloc[:, -1].astype(float).to_numpy())
+            return
+        dates = pd.to_datetime(df["date"])
+        month = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+        amount = df["amount"].astype(float).to_numpy()
+        if self.customer_col:
+            local, uniques = factorize_customers(df[self.customer_col].to_numpy())
+            keep = local >= 0
+            if not keep.all():
+                self.n_missing += len(local) - int(keep.sum())
+                local, month, amount = local[keep], month[keep], amount[keep]
+            codes = np.array([self.customer_codes.setdefault(c, len(self.customer_codes)) for c in uniques],
+                             dtype=np.int64)[local]
+        else:
+            self.customer_codes.setdefault(None, 0)
+            codes = np.zeros(len(df), dtype=np.int64)
+        self._accumulate(codes, month, amount)
+
+    def _accumulate(self, codes, month, amount):
+        if not len(month):
+            return
+        lo, hi = int(month.min()), int(month.max())
+        if self.m0 is None:
+            self.m0 = lo
+        left = max(self.m0 - lo, 0)
+        right = max(hi - (self.m0 + self.sums.shape[1] - 1), 0) if self.sums.shape[1] else hi - lo + 1 - left
+        rows = len(self.customer_codes) - self.sums.shape[0]
+        if left or right or rows:
+            pad = ((0, rows), (left, right))
+            self.sums = np.pad(self.sums, pad)
+            self.counts = np.pad(self.counts, pad)
+            self.m0 -= left
+        n_c, n_m = self.sums.shape
+        flat = codes * n_m + (month - self.m0)
+        self.sums += np.bincount(flat, weights=amount, minlength=n_c * n_m).reshape(n_c, n_m)
+        self.counts += np.bincount(flat, minlength=n_c * n_m).reshape(n_c, n_m)
+
+    def finish(self):
+        if self.buffer:
+            self._consume(self.buffer + b"\n")
+            self.buffer = b""
+        if self.columns is None:
+            raise ValueError("empty upload")
+        if "date" not in self.columns or "amount" not in self.columns:
+            values = np.concatenate(self.values) if self.values else np.zeros(0)
+            return MonthlySeries(values[None, :], np.ones((1, len(values)), dtype=bool))
+        customers = np.array(list(self.customer_codes) or [None], dtype=object)
+        if self.m0 is None:
+            return MonthlySeries(np.zeros((len(customers), 0)), np.zeros((len(customers), 0), dtype=bool), [], customers,
+                                 self.n_missing)
+        order = np.argsort(customers, kind="stable") if self.customer_col else np.arange(len(customers))
+        return MonthlySeries(self.sums[order], self.counts[order] > 0, self.m0 + np.arange(self.sums.shape[1]),
+                             customers[order], self.n_missing)
+
+    @property
+    def digest(self):
+        return self.hash.hexdigest()
+
+
+class TransactionStore:
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.by_path = {}
+        self.by_digest = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            cached = self.by_path.get(path)
+            if cached is not None and cached[0] == stamp:
+                self.hits += 1
+                return self.by_digest[cached[1]]
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            series = self.by_digest.get(digest)
+            if series is None:
+                self.misses += 1
+                series = MonthlySeries.from_bytes(data)
+                self._put(digest, series)
+            else:
+                self.hits += 1
+            self.by_path[path] = (stamp, digest)
+        return series
+
+    def _put(self, digest, series):
+        self.by_digest[digest] = series
+        while len(self.by_digest) > self.max_entries:
+            old = next(iter(self.by_digest))
+            del self.by_digest[old]
+            self.by_path = {p: v for p, v in self.by_path.items() if v[1] != old}
+
+    def put(self, digest, series):
+        with self.lock:
+            self._put(digest, series)
+        return series
+
+    def lookup(self, digest):
+        with self.lock:
+            return self.by_digest.get(digest)
+
+    def clear(self):
+        with self.lock:
+            self.by_path.clear()
+            self.by_digest.clear()
+            self.hits = 0
+            self.misses = 0
+
+STORE = TransactionStore()
+
+def load_monthly(path):
+    return STORE.get(path)
+
+async def aggregate_upload(upload, max_bytes=MAX_UPLOAD_BYTES, chunk_size=CHUNK_SIZE, store=STORE):
+    agg = MonthlyAggregator(max_bytes=max_bytes)
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        agg.feed(chunk)
+    cached = store.lookup(agg.digest) if store is not None else None
+    if cached is not None:
+        return cached
+    series = agg.finish()
+    return store.put(agg.digest, series) if store is not None else series
+
+
+if __name__ == "__main__":
+    import tempfile
+    rng = np.random.default_rng(42)
+    n_tx, n_customers = 1_000_000, 10_000
+    days = rng.integers(0, 730, n_tx)
+    df = pd.DataFrame({
+        "customer_id": rng.integers(0, n_customers, n_tx),
+        "date": (np.datetime64("2024-01-01") + days.astype("timedelta64[D]")).astype(str),
+        "amount": np.round(rng.normal(100, 400, n_tx), 2),
+    })
+    path = os.path.join(tempfile.mkdtemp(), "transactions.csv")
+    df.to_csv(path, index=False)
+    t0 = time.perf_counter()
+    for c, g in list(df.groupby("customer_id"))[:100]:
+        g = g.copy()
+        g["month"] = pd.to_datetime(g["date"]).dt.to_period("M")
+        g.groupby("month")["amount"].sum()
+    legacy = (time.perf_counter() - t0) / 100 * n_customers
+    store = TransactionStore()
+    t0 = time.perf_counter()
+    series = store.get(path)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        store.get(path)
+    warm = (time.perf_counter() - t0) / 1000
+    with open(path, "rb") as f:
+        agg = MonthlyAggregator(max_bytes=None)
+        t0 = time.perf_counter()
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            agg.feed(chunk)
+        streamed = agg.finish()
+        stream = time.perf_counter() - t0
+    X, lengths = series.padded()
+    same = all(np.allclose(streamed.series(c), series.series(c)) for c in range(0, n_customers, 997))
+    print(f"{n_tx} transactions, {len(series)} customers x {X.shape[1]} months | cold parse {cold:.2f}s | "
+          f"cached get {warm * 1e6:.1f} us | per-customer pandas groupby (extrapolated) {legacy:.1f}s")
+    print(f"streamed {agg.n_bytes / 1e6:.1f} MB in {CHUNK_SIZE >> 10} KB chunks: {stream:.2f}s, "
+          f"state {(agg.sums.nbytes + agg.counts.nbytes) / 1e6:.1f} MB | matches file parse: {same}")
@@ -1,10 +1,24 @@
 import os
 import json
+import logging
 import sqlite3
 
 DB_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "aegis.db"))
 SCHEMA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "schema.sql"))
 
+logger = logging.getLogger(__name__)
+
+_SUBSCRIBERS = []
+
+def subscribe(fn):
+    if fn not in _SUBSCRIBERS:
+        _SUBSCRIBERS.append(fn)
+    return fn
+
+def unsubscribe(fn):
+    if fn in _SUBSCRIBERS:
+        _SUBSCRIBERS.remove(fn)
+
 def init_db():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
@@ -35,7 +49,7 @@ def log_metric(run_id, name, value):
     conn.commit()
     conn.close()
 
-def log_contract(run_id, contract, compliance_score, profit_expectation, survival_probability):
+def log_contract(run_id, contract, compliance_score, profit_expectation, survival_probability, group=None, approved=None):
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
     cur.execute(
@@ -44,3 +58,17 @@ def log_contract(run_id, contract, compliance_score, profit_expectation, surviva
     )
     conn.commit()
     conn.close()
+    event = {
+        "run_id": run_id,
+        "contract": contract,
+        "compliance_score": float(compliance_score),
+        "profit_expectation": float(profit_expectation),
+        "survival_probability": float(survival_probability),
+        "group": group,
+        "approved": approved,
+    }
+    for fn in list(_SUBSCRIBERS):
+        try:
+            fn(event)
+        except Exception:
+            logger.exception("contract subscriber failed")
@@ -5,11 +5,13 @@ from .agents.risk_agent import RiskIntelligenceAgent
 from .agents.bank_strategy import BankStrategyAgent
 from .agents.negotiation_customer import CustomerNegotiationAgent
 from .agents.compliance_agent import ComplianceAgent
-from .agents.fairness_agent import FairnessAgent
+from .agents.fairness_agent import APPROVE_BELOW_PD, FairnessAgent
+from .agents.fairness_monitor import shared_monitor
 from .agents.meta_rl_agent import MetaRLAgent
 from .environment.financial_env import FinancialEnv
 from .environment.rl_env_extended import RLEnvironment as ExperimentalRLEnvironment
 from .math.financial_math import apr as experimental_apr
+from .math.contract_schedule import evaluate_contract
 from .database.logger import init_db, new_run, log_metric, log_contract
 
 def run_demo_scenario():
@@ -40,7 +42,8 @@ def run_demo_scenario():
     bank = BankStrategyAgent()
     customer = CustomerNegotiationAgent()
     compliance = ComplianceAgent()
-    fairness = FairnessAgent()
+    monitor = shared_monitor()
+    fairness = FairnessAgent(monitor.cohort(), min_n=monitor.min_group_size)
     initial = {"interest_rate": 0.12, "tenure_months": 120, "grace_period": False, "restructure_pct": 0.0}
     rl = MetaRLAgent(use_sb3=False)
     sim = rl.negotiate(env, bank, customer, risk, fairness, compliance, initial, rounds=7)
@@ -51,11 +54,11 @@ def run_demo_scenario():
     default_accuracy = float(1.0 - abs(twin["default_probability"] - risk_out["distress_probabilities"]["90d"]) if "distress_probabilities" in risk_out else 0.0)
     reward_curve = sim["reward_curve"]
     reward_improvement = float(reward_curve[-1] - reward_curve[0]) if reward_curve else 0.0
-    total_rules = len(compliance.rules) if hasattr(compliance, "rules") else 5
-    violations = len(comp.get("violations", []))
-    compliance_precision = float((total_rules - violations) / max(total_rules, 1))
-    initial_profit = float(initial["interest_rate"] * debt * initial["tenure_months"] / 12.0)
-    final_profit = float(final["interest_rate"] * debt * final["tenure_months"] / 12.0)
+    checks = comp["checks"]
+    violations = len(comp["violations"])
+    compliance_precision = float((checks - violations) / max(checks, 1))
+    initial_profit = evaluate_contract(initial, debt, twin["default_probability"])["el_adjusted_profit"]
+    final_profit = evaluate_contract(final, debt, env.state["default_probability"])["el_adjusted_profit"]
     profit_delta = float(final_profit - initial_profit)
     survival_delta = float((1.0 - env.state["default_probability"]) - (1.0 - twin["default_probability"]))
     log_metric(run_id, "default_prediction_accuracy", default_accuracy)
@@ -63,7 +66,8 @@ def run_demo_scenario():
     log_metric(run_id, "compliance_detection_precision", compliance_precision)
     log_metric(run_id, "profit_delta", profit_delta)
     log_metric(run_id, "survival_probability_delta", survival_delta)
-    log_contract(run_id, final, comp["compliance_score"], final_profit, 1.0 - env.state["default_probability"])
+    log_contract(run_id, final, comp["compliance_score"], final_profit, 1.0 - env.state["default_probability"],
+                 approved=env.state["default_probability"] < APPROVE_BELOW_PD)
     return {
         "experimental_enabled": experimental,
         "digital_twin": twin,
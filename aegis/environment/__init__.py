@@ -1 +1 @@
-__all__ = ["financial_env", "reward_engine", "shock_simulator"]
+__all__ = ["financial_env", "reward_engine", "shock_simulator", "stress_engine"]
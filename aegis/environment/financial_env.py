@@ -1,15 +1,12 @@
 import numpy as np
-from .reward_engine import compute_reward
+from .reward_engine import COMPONENTS, DEFAULT_WEIGHTS, compute_reward, compute_reward_batch, reward_details, weight_vector
+
+ACTION_FIELDS = ("rate_delta", "tenure_delta", "grace_toggle", "collateral_adjust")
+STATE_FIELDS = ("default_probability", "emi_ratio", "bank_exposure", "compliance_score", "fairness_index")
 
 class FinancialEnv:
     def __init__(self, weights=None):
-        self.weights = weights or {
-            "bank_profit": 0.25,
-            "customer_survival": 0.25,
-            "default_probability": 0.2,
-            "compliance_violation": 0.15,
-            "fairness_deviation": 0.15,
-        }
+        self.weights = weights or dict(DEFAULT_WEIGHTS)
         self.state = {
             "default_probability": 0.0,
             "cashflow_forecast": np.zeros(12).tolist(),
@@ -53,3 +50,113 @@ class FinancialEnv:
         reward, details = compute_reward(reward_components, self.weights)
         self.transcript.append({"action": action, "reward": reward, "details": details})
         return self.state, reward, details
+
+
+def action_matrix(actions):
+    return np.array([[float(a.get(k, 0.0)) for k in ACTION_FIELDS] for a in actions])
+
+
+class BatchFinancialEnv:
+
+    def __init__(self, n, weights=None):
+        self.n = n
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.w = weight_vector(self.weights)
+        self.state = np.zeros((len(STATE_FIELDS), n))
+        self.default_probability, self.emi_ratio, self.bank_exposure, self.compliance_score, self.fairness_index = self.state
+        self.components = np.zeros((n, len(COMPONENTS)))
+        self.rewards = np.zeros(n)
+        self.steps = 0
+
+    def set_weights(self, weights):
+        self.weights.update(weights)
+        weight_vector(self.weights, out=self.w)
+
+    def reset(self, default_probability=0.0, emi_ratio=0.0, bank_exposure=0.0, compliance_score=100.0, fairness_index=1.0):
+        self.default_probability[:] = default_probability
+        self.emi_ratio[:] = emi_ratio
+        self.bank_exposure[:] = bank_exposure
+        self.compliance_score[:] = compliance_score
+        self.fairness_index[:] = fairness_index
+        self.components[:] = 0.0
+        self.rewards[:] = 0.0
+        self.steps = 0
+        return self.state
+
+    def observe(self):
+        return self.state
+
+    def step(self, actions, default_probability=None, compliance_score=None, fairness_index=None, customer_survival=None):
+        rate_delta, tenure_delta, grace_toggle, collateral_adjust = np.asarray(actions, dtype=float).T
+        emi = self.emi_ratio
+        emi += rate_delta * 0.5
+        emi -= tenure_delta * 0.005
+        np.maximum(emi, 0.0, out=emi)
+        emi *= np.where(grace_toggle != 0, 0.95, 1.0)
+        exposure = self.bank_exposure
+        exposure += collateral_adjust * -0.8
+        exposure += rate_delta * 0.4
+        np.maximum(exposure, 0.0, out=exposure)
+        if default_probability is not None:
+            self.default_probability[:] = default_probability
+        if compliance_score is not None:
+            self.compliance_score[:] = compliance_score
+        if fairness_index is not None:
+            self.fairness_index[:] = fairness_index
+        C = self.components.T
+        np.maximum(rate_delta * 10 + exposure * 0.1, 0.0, out=C[0])
+        if customer_survival is None:
+            np.subtract(1.0, self.default_probability, out=C[1])
+        else:
+            C[1] = customer_survival
+        C[2] = self.default_probability
+        np.maximum((100.0 - self.compliance_score) / 100.0, 0.0, out=C[3])
+        np.abs(1.0 - self.fairness_index, out=C[4])
+        compute_reward_batch(self.components, self.w, out=self.rewards)
+        self.steps += 1
+        return self.rewards
+
+    def details(self, i=None):
+        if i is None:
+            return [reward_details(self.components, self.w, j) for j in range(self.n)]
+        return reward_details(self.components, self.w, i)
+
+    def row(self, i):
+        return {k: float(v[i]) for k, v in zip(STATE_FIELDS, self.state)}
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    n, rounds = 100_000, 7
+    table = action_matrix([
+        {"rate_delta": -0.01, "tenure_delta": 12, "grace_toggle": True, "collateral_adjust": -0.02},
+        {"rate_delta": 0.0, "tenure_delta": 6, "grace_toggle": False, "collateral_adjust": 0.0},
+        {"rate_delta": 0.01, "tenure_delta": -6, "grace_toggle": False, "collateral_adjust": 0.02},
+    ])
+    emi0 = rng.beta(2, 5, n)
+    exposure0 = rng.lognormal(10, 0.5, n)
+    dp0 = rng.beta(2, 8, n)
+    acts = rng.integers(0, len(table), (rounds, n))
+    fair = rng.uniform(0.8, 1.0, (rounds, n))
+    env = BatchFinancialEnv(n)
+    env.reset(dp0, emi0, exposure0)
+    t0 = time.perf_counter()
+    for t in range(rounds):
+        env.step(table[acts[t]], fairness_index=fair[t])
+    batch = time.perf_counter() - t0
+    k = 2000
+    scalar = []
+    t0 = time.perf_counter()
+    for i in range(k):
+        e = FinancialEnv()
+        e.reset({"default_probability": dp0[i], "emi_ratio": emi0[i], "bank_exposure": exposure0[i]})
+        for t in range(rounds):
+            a = dict(zip(ACTION_FIELDS, table[acts[t, i]]))
+            a["grace_toggle"] = bool(a["grace_toggle"])
+            _, r, _ = e.step(a, {"fairness_index": fair[t, i]})
+        scalar.append(r)
+    loop = (time.perf_counter() - t0) / k * n
+    err = np.abs(np.array(scalar) - env.rewards[:k]).max()
+    print(f"{n:,} negotiations x {rounds} steps: batch env {batch * 1e3:.1f} ms ({n * rounds / batch / 1e6:.1f}M steps/s) | "
+          f"dict env (extrapolated) {loop:.1f}s | {loop / batch:.0f}x | max reward diff {err:.1e}")
@@ -1,5 +1,15 @@
 import numpy as np
 
+COMPONENTS = ("bank_profit", "customer_survival", "default_probability", "compliance_violation", "fairness_deviation")
+SIGNS = np.array([1.0, 1.0, -1.0, -1.0, -1.0])
+DEFAULT_WEIGHTS = {
+    "bank_profit": 0.25,
+    "customer_survival": 0.25,
+    "default_probability": 0.2,
+    "compliance_violation": 0.15,
+    "fairness_deviation": 0.15,
+}
+
 def compute_reward(components, weights):
     w = np.array([
         weights.get("bank_profit", 0.25),
@@ -16,3 +26,16 @@ def compute_reward(components, weights):
         components.get("fairness_deviation", 0.0),
     ])
     return float(np.dot(w, c)), {"weights": w.tolist(), "components": c.tolist()}
+
+def weight_vector(weights=None, out=None):
+    weights = weights or DEFAULT_WEIGHTS
+    out = np.empty(len(COMPONENTS)) if out is None else out
+    for j, k in enumerate(COMPONENTS):
+        out[j] = SIGNS[j] * weights.get(k, DEFAULT_WEIGHTS[k])
+    return out
+
+def compute_reward_batch(components, w, out=None):
+    return np.matmul(components, w, out=out)
+
+def reward_details(components, w, i):
+    return {"weights": w.tolist(), "components": components[i].tolist()}
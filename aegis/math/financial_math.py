@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 def apr(nominal_rate, compounding_per_year):
     r = float(nominal_rate)
@@ -37,3 +38,143 @@ def irr(cashflows, guess=0.1, max_iter=32, tol=1e-6):
         else:
             hi = mid
     return (lo + hi) / 2
+
+def apr_batch(nominal_rate, compounding_per_year):
+    r = np.asarray(nominal_rate, dtype=float)
+    m = np.asarray(compounding_per_year, dtype=float)
+    m = np.where(m > 0, np.floor(m), 1.0)
+    return np.expm1(m * np.log1p(r / m))
+
+def emi_batch(principal, annual_rate, months):
+    P = np.asarray(principal, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 12.0
+    n = np.floor(np.asarray(months, dtype=float))
+    f1 = np.expm1(n * np.log1p(r))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        e = np.where(r == 0, P / np.maximum(n, 1), P * r * (f1 + 1) / f1)
+    return np.where(n <= 0, 0.0, e)
+
+def discount_factors(rates, periods):
+    r = np.asarray(rates, dtype=float)
+    return np.exp(-np.multiply.outer(np.log1p(r), np.arange(periods, dtype=float)))
+
+def npv_batch(cashflows, discount_rate):
+    C = np.asarray(cashflows, dtype=float)
+    r = np.asarray(discount_rate, dtype=float)
+    D = discount_factors(r, C.shape[-1])
+    if r.ndim == 0:
+        return C @ D
+    return np.einsum("...t,...t->...", C, D)
+
+def irr_guess(C):
+    t = np.arange(C.shape[1], dtype=float)
+    pos = np.maximum(C, 0.0)
+    neg = np.maximum(-C, 0.0)
+    p, q = pos.sum(axis=1), neg.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        duration = (pos @ t) / p - (neg @ t) / q
+        x = (p / q) ** (1.0 / np.maximum(np.abs(duration), 1.0)) - 1.0
+    return np.where(np.isfinite(x), x, 0.1)
+
+def irr_batch(cashflows, guess=None, max_iter=50, tol=1e-10, lo=-0.99, hi=10.0):
+    C = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    n, T = C.shape
+    t = np.arange(T, dtype=float)
+    guess = irr_guess(C) if guess is None else guess
+    lo = np.full(n, lo)
+    hi = np.full(n, hi)
+    f_lo = npv_batch(C, lo)
+    f_hi = npv_batch(C, hi)
+    x = np.clip(np.broadcast_to(np.asarray(guess, dtype=float), (n,)).copy(), lo, hi)
+    out = np.full(n, np.nan)
+    active = np.flatnonzero(np.sign(f_lo) != np.sign(f_hi))
+    defined = (C != 0).any(axis=1)
+    hit_lo = (np.abs(f_lo) < tol) & defined
+    hit_hi = (np.abs(f_hi) < tol) & defined
+    out[hit_lo] = lo[hit_lo]
+    out[hit_hi & ~hit_lo] = hi[hit_hi & ~hit_lo]
+    active = active[~(hit_lo | hit_hi)[active]]
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        xa = x[active]
+        Ca = C[active]
+        D = np.exp(-np.outer(np.log1p(xa), t))
+        f = np.einsum("ij,ij->i", Ca, D)
+        fp = -np.einsum("ij,ij->i", Ca * t, D) / (1.0 + xa)
+        same = np.sign(f) == np.sign(f_lo[active])
+        lo[active] = np.where(same, xa, lo[active])
+        hi[active] = np.where(same, hi[active], xa)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = f / fp
+        newton = xa - step
+        ok = np.isfinite(newton) & (newton > lo[active]) & (newton < hi[active])
+        nxt = np.where(ok, newton, 0.5 * (lo[active] + hi[active]))
+        done = (np.abs(f) < tol) | (np.abs(nxt - xa) < tol * (1.0 + np.abs(xa)))
+        out[active[done]] = np.where(np.abs(f[done]) < tol, xa[done], nxt[done])
+        x[active] = nxt
+        active = active[~done]
+    out[active] = x[active]
+    return out
+
+def amortization_schedule(principal, annual_rate, months, periods=None):
+    P = np.atleast_1d(np.asarray(principal, dtype=float))
+    r = np.atleast_1d(np.asarray(annual_rate, dtype=float)) / 12.0
+    n = np.atleast_1d(np.floor(np.asarray(months, dtype=float)))
+    P, r, n = np.broadcast_arrays(P, r, n)
+    T = int(periods if periods is not None else max(int(n.max(initial=0)), 0))
+    t = np.arange(T + 1, dtype=float)
+    E = emi_batch(P, r * 12.0, n)
+    g1 = np.expm1(np.outer(np.log1p(r), t))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paid = np.where(r[:, None] == 0, E[:, None] * t, E[:, None] * g1 / r[:, None])
+    live = t <= n[:, None]
+    balance = np.where(live, np.maximum(P[:, None] * (g1 + 1) - paid, 0.0), 0.0)
+    interest = r[:, None] * balance[:, :-1]
+    payment = np.where(live[:, 1:], E[:, None], 0.0)
+    return {
+        "payment": payment,
+        "interest": np.where(live[:, 1:], interest, 0.0),
+        "principal": np.where(live[:, 1:], payment - interest, 0.0),
+        "balance": balance[:, 1:],
+    }
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    n, T = 1_000_000, 60
+    P = rng.uniform(5_000, 200_000, n)
+    rate = rng.uniform(0.03, 0.24, n)
+    months = rng.integers(12, T + 1, n)
+    k = 20_000
+
+    def bench(label, batch, scalar, m=k):
+        t0 = time.perf_counter()
+        got = batch()
+        dt = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ref = np.array([scalar(i) for i in range(m)])
+        slow = (time.perf_counter() - t0) / m * len(got)
+        err = np.nanmax(np.abs(got[:m] - ref) / (np.abs(ref) + 1e-12))
+        print(f"{label:<34} {len(got):>9,} rows: {dt:7.3f}s | scalar (extrapolated) {slow:8.1f}s | "
+              f"{slow / dt:6.0f}x | max rel err {err:.1e}")
+
+    bench("emi", lambda: emi_batch(P, rate, months), lambda i: emi(P[i], rate[i], months[i]))
+    bench("apr (monthly compounding)", lambda: apr_batch(rate, 12), lambda i: apr(rate[i], 12))
+    E = emi_batch(P, rate, months)
+    C = np.where(np.arange(T + 1) <= months[:, None], E[:, None], 0.0)
+    C[:, 0] = -P * rng.uniform(0.97, 1.0, n)
+    cof = rng.uniform(0.002, 0.01, n)
+    bench(f"npv ({T + 1} periods, per-row rate)", lambda: npv_batch(C, cof), lambda i: npv(C[i], cof[i]))
+    m = 200_000
+    bench(f"irr ({T + 1} periods, Newton+bisection)", lambda: irr_batch(C[:m]), lambda i: irr(C[i]), 2_000)
+    t0 = time.perf_counter()
+    total_interest = 0.0
+    for s in range(0, n, 100_000):
+        sched = amortization_schedule(P[s:s + 100_000], rate[s:s + 100_000], months[s:s + 100_000], T)
+        total_interest += sched["interest"].sum()
+    dt = time.perf_counter() - t0
+    closed = float((E * months - P).sum())
+    print(f"amortization schedules {n:,} loans x {T} months (100k chunks): {dt:.2f}s | "
+          f"total interest rel err vs closed form {abs(total_interest - closed) / closed:.1e}")
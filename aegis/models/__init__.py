@@ -1 +1 @@
-__all__ = ["transformer_model", "default_predictor"]
+__all__ = ["transformer_model", "forecaster", "stat_forecaster", "default_predictor"]
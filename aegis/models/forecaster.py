@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+import numpy as np
+
+try:
+    import torch
+    import torch.nn as nn
+except Exception:
+    torch = None
+    nn = None
+
+from .transformer_model import SimpleTimeSeriesTransformer
+
+HORIZON = 12
+LOOKBACK = 24
+MIN_HISTORY = 3
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+KIND = os.environ.get("AEGIS_FORECASTER", "lstm")
+THREADS = int(os.environ.get("AEGIS_TORCH_THREADS", "0")) or None
+
+def weights_path(kind):
+    return os.path.join(MODEL_DIR, f"forecaster_{kind}.pt")
+
+class LSTMForecaster(nn.Module if nn else object):
+    def __init__(self, hidden_size=32, num_layers=1, input_size=2, horizon=HORIZON):
+        super().__init__()
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        self.fc = nn.Linear(hidden_size, horizon)
+
+    def forward(self, x, padding_mask=None):
+        out, _ = self.lstm(x)
+        return self.fc(out[:, -1, :])
+
+def build_model(kind, **config):
+    if kind == "lstm":
+        return LSTMForecaster(**config)
+    if kind == "transformer":
+        return SimpleTimeSeriesTransformer(input_size=2, horizon=HORIZON, max_len=LOOKBACK, **config)
+    raise ValueError(f"unknown forecaster '{kind}'")
+
+def configure_threads(num_threads=None):
+    torch.set_num_threads(int(num_threads or os.cpu_count() or 1))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+def pad_series(series, lookback=LOOKBACK):
+    X = np.zeros((len(series), lookback), dtype=np.float32)
+    mask = np.zeros((len(series), lookback), dtype=bool)
+    for i, s in enumerate(series):
+        s = np.asarray(s, dtype=np.float32)[-lookback:]
+        if len(s):
+            X[i, lookback - len(s):] = s
+            mask[i, lookback - len(s):] = True
+    return X, mask
+
+def left_align(values, lengths, lookback=LOOKBACK):
+    values = np.asarray(values, dtype=np.float32)
+    lengths = np.minimum(np.asarray(lengths, dtype=np.int64), values.shape[1])
+    idx = lengths[:, None] - lookback + np.arange(lookback)
+    mask = idx >= 0
+    X = np.take_along_axis(values, np.clip(idx, 0, max(values.shape[1] - 1, 0)), axis=1)
+    return np.where(mask, X, 0.0).astype(np.float32), mask
+
+def _inputs(X, mask):
+    count = np.maximum(mask.sum(axis=1, keepdims=True), 1)
+    scale = (np.abs(X) * mask).sum(axis=1, keepdims=True) / count + 1e-6
+    return np.stack([X / scale, mask.astype(np.float32)], axis=-1).astype(np.float32), scale
+
+def synthetic_series(n, length, rng):
+    t = np.arange(length)
+    level = rng.lognormal(8, 0.5, (n, 1))
+    trend = rng.normal(0, 0.01, (n, 1))
+    season = rng.beta(2, 8, (n, 1)) * np.sin(2 * np.pi * (t + rng.integers(0, 12, (n, 1))) / 12)
+    shock_at = np.where(rng.random((n, 1)) < 0.15, rng.integers(0, length, (n, 1)), length)
+    shock = np.where(t >= shock_at, rng.uniform(0.6, 0.9, (n, 1)), 1.0)
+    noise = rng.normal(0, 0.05, (n, length))
+    return (level * (1 + trend * t + season + noise) * shock).astype(np.float32)
+
+def train_forecaster(kind=KIND, n_series=50000, epochs=15, batch_size=256, lr=3e-3, seed=42, path=None, config=None):
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    config = dict(config or ({"hidden_size": 32} if kind == "lstm" else {"d_model": 32, "nhead": 4, "dim_feedforward": 64}))
+    model = build_model(kind, **config)
+    S = synthetic_series(n_series + 2000, LOOKBACK + HORIZON, rng)
+    lengths = rng.integers(MIN_HISTORY, LOOKBACK + 1, len(S))
+    X, mask = left_align(S[:, :LOOKBACK], np.full(len(S), LOOKBACK))
+    mask &= np.arange(LOOKBACK) >= LOOKBACK - lengths[:, None]
+    X = np.where(mask, X, 0.0)
+    inp, scale = _inputs(X, mask)
+    y = S[:, LOOKBACK:] / scale
+    inp, y, pad = torch.from_numpy(inp), torch.from_numpy(y.astype(np.float32)), torch.from_numpy(~mask)
+    va = slice(n_series, None)
+    opt = torch.optim.Adam(model.parameters(), lr=lr)
+    sched = torch.optim.lr_scheduler.CosineAnnealingLR(opt, epochs)
+    loss_fn = nn.MSELoss()
+    for epoch in range(epochs):
+        model.train()
+        perm = torch.randperm(n_series)
+        for s in range(0, n_series, batch_size):
+            b = perm[s:s + batch_size]
+            opt.zero_grad()
+            loss = loss_fn(model(inp[b], pad[b]), y[b])
+            loss.backward()
+            opt.step()
+        sched.step()
+        model.eval()
+        with torch.inference_mode():
+            val = float(loss_fn(model(inp[va], pad[va]), y[va]))
+        print(f"[{kind}] epoch {epoch + 1}/{epochs} val mse {val:.5f}")
+    naive = float(((inp[va][:, -1:, 0] - y[va]) ** 2).mean())
+    path = path or weights_path(kind)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save({"kind": kind, "config": config, "lookback": LOOKBACK, "horizon": HORIZON,
+                "val_mse": val, "naive_mse": naive, "state_dict": model.state_dict()}, path)
+    print(f"[{kind}] saved to {path} (val mse {val:.5f} vs last-value {naive:.5f})")
+    return model
+
+
+class BatchForecaster:
+
+    _cache = {}
+
+    def __init__(self, kind=KIND, path=None):
+        ckpt = torch.load(path or weights_path(kind), map_location="cpu", weights_only=True)
+        self.kind = ckpt["kind"]
+        self.lookback = ckpt["lookback"]
+        self.horizon = ckpt["horizon"]
+        self.model = build_model(self.kind, **ckpt["config"])
+        self.model.load_state_dict(ckpt["state_dict"])
+        self.model.eval()
+
+    @classmethod
+    def load(cls, kind=KIND, path=None):
+        path = path or weights_path(kind)
+        if torch is None or not os.path.exists(path):
+            return None
+        if path not in cls._cache:
+            cls._cache[path] = cls(kind, path)
+        return cls._cache[path]
+
+    def _predict_aligned(self, X, mask, batch_size):
+        inp, scale = _inputs(X, mask)
+        out = np.empty((len(X), self.horizon), dtype=np.float32)
+        with torch.inference_mode():
+            for s in range(0, len(X), batch_size):
+                b = slice(s, s + batch_size)
+                out[b] = self.model(torch.from_numpy(inp[b]), torch.from_numpy(~mask[b])).numpy()
+        return out * scale
+
+    def predict(self, series, lengths=None, months=HORIZON, batch_size=8192):
+        if isinstance(series, np.ndarray) and series.ndim == 2:
+            n_valid = np.full(len(series), series.shape[1]) if lengths is None else lengths
+            X, mask = left_align(series, n_valid, self.lookback)
+        else:
+            X, mask = pad_series(series, self.lookback)
+        empty = ~mask.any(axis=1)
+        if not empty.any():
+            return self._forecast(X, mask, months, batch_size)
+        out = np.zeros((len(X), months))
+        if not empty.all():
+            out[~empty] = self._forecast(X[~empty], mask[~empty], months, batch_size)
+        return out
+
+    def _forecast(self, X, mask, months, batch_size):
+        preds = []
+        done = 0
+        while done < months:
+            p = self._predict_aligned(X, mask, batch_size)
+            preds.append(p)
+            done += self.horizon
+            if done < months:
+                X = np.concatenate([X, p], axis=1)[:, -self.lookback:]
+                mask = np.concatenate([mask, np.ones_like(p, dtype=bool)], axis=1)[:, -self.lookback:]
+        return np.concatenate(preds, axis=1)[:, :months].astype(float)
+
+
+def _legacy_forecast(model, series, months=HORIZON):
+    arr = torch.tensor(series, dtype=torch.float32).view(1, -1, 1)
+    preds = []
+    last = arr
+    for _ in range(months):
+        y = model(last)
+        preds.append(float(y.detach().numpy().item()))
+        last = torch.cat([last[:, 1:, :], y.view(1, 1, 1)], dim=1)
+    return np.array(preds)
+
+def benchmark(n=100_000, n_legacy=300, seed=0):
+    rng = np.random.default_rng(seed)
+    S = synthetic_series(n, LOOKBACK + HORIZON, rng)
+    hist, future = S[:, :LOOKBACK], S[:, LOOKBACK:]
+
+    class LegacyLSTM(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.lstm = nn.LSTM(1, 16, 1, batch_first=True)
+            self.fc = nn.Linear(16, 1)
+
+        def forward(self, x):
+            out, _ = self.lstm(x)
+            return self.fc(out[:, -1, :])
+
+    t0 = time.perf_counter()
+    for i in range(n_legacy):
+        legacy = LegacyLSTM()
+        legacy.eval()
+        _legacy_forecast(legacy, hist[i])
+    legacy_rate = n_legacy / (time.perf_counter() - t0)
+    print(f"threads={torch.get_num_threads()} | legacy autoregressive loop: {legacy_rate:,.0f} borrowers/s")
+    naive = np.abs(future - hist[:, -1:]).mean() / np.abs(future).mean()
+    for kind in ("lstm", "transformer"):
+        f = BatchForecaster.load(kind)
+        if f is None:
+            print(f"{kind}: no weights at {weights_path(kind)}, run 'python -m aegis.models.forecaster train'")
+            continue
+        f.predict(hist[:1000])
+        t0 = time.perf_counter()
+        pred = f.predict(hist)
+        rate = n / (time.perf_counter() - t0)
+        mae = np.abs(pred - future).mean() / np.abs(future).mean()
+        print(f"{kind:<11} batched direct head: {rate:,.0f} borrowers/s ({rate / legacy_rate:,.0f}x) | "
+              f"relative MAE {mae:.4f} (last-value {naive:.4f})")
+
+
+if __name__ == "__main__":
+    configure_threads(THREADS)
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if cmd == "train":
+        for kind in (sys.argv[2:] or ["lstm", "transformer"]):
+            train_forecaster(kind)
+    else:
+        benchmark()
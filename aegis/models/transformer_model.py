@@ -6,18 +6,21 @@ except Exception:
     nn = None
 
 class SimpleTimeSeriesTransformer(nn.Module if nn else object):
-    def __init__(self, d_model=16, nhead=2, num_layers=1):
+    def __init__(self, d_model=16, nhead=2, num_layers=1, input_size=1, horizon=1, max_len=None, dim_feedforward=2048):
         if nn:
             super().__init__()
-            self.embed = nn.Linear(1, d_model)
-            encoder_layer = nn.TransformerEncoderLayer(d_model=d_model, nhead=nhead, batch_first=True)
-            self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
-            self.fc = nn.Linear(d_model, 1)
+            self.embed = nn.Linear(input_size, d_model)
+            self.pos = nn.Parameter(torch.zeros(1, max_len, d_model)) if max_len else None
+            encoder_layer = nn.TransformerEncoderLayer(d_model=d_model, nhead=nhead, dim_feedforward=dim_feedforward, batch_first=True)
+            self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers, enable_nested_tensor=False)
+            self.fc = nn.Linear(d_model, horizon)
         else:
             self.encoder = None
-    def forward(self, x):
+    def forward(self, x, padding_mask=None):
         if nn:
             h = self.embed(x)
-            h = self.encoder(h)
+            if self.pos is not None:
+                h = h + self.pos[:, -h.shape[1]:, :]
+            h = self.encoder(h, src_key_padding_mask=padding_mask)
             return self.fc(h[:, -1, :])
         return x[:, -1, :]
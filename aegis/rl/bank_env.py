@@ -2,10 +2,14 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-import pandas as pd
 import os
 import pickle
 import logging
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from aegis.rl.customer_pool import CustomerPool
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +17,7 @@ class BankLendingEnv(gym.Env):
     
     metadata = {'render_modes': ['human']}
     
-    def __init__(self, customer_data=None, config=None, seed=42):
+    def __init__(self, customer_data=None, config=None, seed=42, regulator=None):
         super().__init__()
         
         self.seed_val = seed
@@ -27,7 +31,7 @@ class BankLendingEnv(gym.Env):
         self.REWARD_SCALE = self.config.get('reward_scale', 10000)
         
         if customer_data is not None:
-            self.customer_pool = customer_data
+            self.customer_pool = CustomerPool.coerce(customer_data)
         else:
             self.customer_pool = self._generate_synthetic_pool(1000)
         
@@ -36,6 +40,8 @@ class BankLendingEnv(gym.Env):
         self.n_customer_features = 5
         
         self.state_dim = 11
+        self._state_low = np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0.5])
+        self._state_high = np.array([1, 500000, 0.3, 500000, 1000000, 50000, 1, 48, 2 * self.INITIAL_CAPITAL, 1, 1.5])
         self.observation_space = spaces.Box(low=-1.0, high=1.0, shape=(self.state_dim,), dtype=np.float32)
         
         self.action_space = spaces.Box(
@@ -48,7 +54,7 @@ class BankLendingEnv(gym.Env):
         self.risk_budget = 1.0
         self.macro_factor = 1.0
         
-        self.current_customer = None
+        self.customer_idx = None
         self.current_step = 0
         self.outstanding_loan = 0
         self.interest_rate = 0
@@ -58,44 +64,70 @@ class BankLendingEnv(gym.Env):
         self.n_approved = 0
         self.episode_log = []
         
+        self.regulator = regulator
+        self.loan_id = None
+        
     def _generate_synthetic_pool(self, n):
         
-        rng = self.rng
-        pool = pd.DataFrame({
-            'pd_score': rng.beta(2, 10, n),
-            'income': rng.lognormal(11, 0.8, n),
-            'credit_amount': rng.lognormal(12, 0.5, n),
-            'annuity': rng.lognormal(9, 0.5, n),
-            'ext_source': rng.beta(5, 3, n),
-            'loan_amount': rng.lognormal(11.5, 0.6, n),
-            'base_interest': rng.uniform(0.05, 0.15, n),
-            'duration': rng.integers(12, 48, n)
-        })
-        return pool
+        return CustomerPool.synthetic(n, self.rng)
     
     def _normalize(self, val, low, high):
         
         return np.clip(2 * (val - low) / (high - low + 1e-8) - 1, -1, 1)
     
+    @property
+    def current_customer(self):
+        if self.customer_idx is None:
+            return None
+        return self.customer_pool.row(self.customer_idx)
+    
+    def _draw_customer(self):
+        
+        idx = self.rng.integers(0, self.n_customers)
+        self.customer_idx = idx
+        p = self.customer_pool
+        self.outstanding_loan = float(p.loan_amount[idx])
+        self.interest_rate = float(p.base_interest[idx])
+        self.pd_score = float(p.pd_score[idx])
+    
+    def book_loan(self, regulator, loan_id):
+        
+        if self.loan_id is not None and self.loan_id != loan_id and self.loan_id in self.regulator.loans:
+            self.regulator.remove_loan(self.loan_id)
+        self.regulator = regulator
+        self.loan_id = loan_id
+    
+    def _report_loan(self, defaulted):
+        
+        if self.regulator is None or self.loan_id is None or self.loan_id not in self.regulator.loans:
+            self.loan_id = None
+            return
+        if defaulted or self.outstanding_loan <= 0:
+            self.regulator.remove_loan(self.loan_id)
+            self.loan_id = None
+        else:
+            self.regulator.update_loan(self.loan_id, self.outstanding_loan)
+    
     def _get_state(self):
         
-        c = self.current_customer
-        
-        state = np.array([
-            self._normalize(self.pd_score, 0, 1),
-            self._normalize(self.outstanding_loan, 0, 500000),
-            self._normalize(self.interest_rate, 0, 0.3),
-            self._normalize(c['income'], 0, 500000),
-            self._normalize(c['credit_amount'], 0, 1000000),
-            self._normalize(c['annuity'], 0, 50000),
-            self._normalize(c['ext_source'], 0, 1),
-            self._normalize(c.get('duration', 24), 0, 48),
-            self._normalize(self.bank_capital, 0, 2 * self.INITIAL_CAPITAL),
-            self._normalize(self.risk_budget, 0, 1),
-            self._normalize(self.macro_factor, 0.5, 1.5)
-        ], dtype=np.float32)
-        
-        return state
+        p = self.customer_pool
+        idx = self.customer_idx
+        
+        raw = np.array([
+            self.pd_score,
+            self.outstanding_loan,
+            self.interest_rate,
+            p.income[idx],
+            p.credit_amount[idx],
+            p.annuity[idx],
+            p.ext_source[idx],
+            p.duration[idx],
+            self.bank_capital,
+            self.risk_budget,
+            self.macro_factor
+        ], dtype=np.float64)
+        
+        return self._normalize(raw, self._state_low, self._state_high).astype(np.float32)
     
     def reset(self, seed=None, options=None):
         
@@ -104,13 +136,16 @@ class BankLendingEnv(gym.Env):
         if seed is not None:
             self.rng = np.random.default_rng(seed)
         
-        idx = self.rng.integers(0, self.n_customers)
-        self.current_customer = self.customer_pool.iloc[idx].to_dict()
+        if options and options.get('reset_capital', False):
+            self.bank_capital = self.INITIAL_CAPITAL
+        
+        if self.loan_id is not None:
+            self.outstanding_loan = 0
+            self._report_loan(False)
+        
+        self._draw_customer()
         
         self.current_step = 0
-        self.outstanding_loan = self.current_customer['loan_amount']
-        self.interest_rate = self.current_customer['base_interest']
-        self.pd_score = self.current_customer['pd_score']
         self.total_profit = 0
         self.n_defaults = 0
         self.n_approved = 0
@@ -159,6 +194,7 @@ class BankLendingEnv(gym.Env):
                 self.bank_capital -= loss
                 self.n_defaults += 1
                 self.outstanding_loan *= (1 - self.LGD)
+                self._report_loan(True)
                 return True
             else:
                 monthly_payment = self.outstanding_loan * self.interest_rate / 12
@@ -167,6 +203,7 @@ class BankLendingEnv(gym.Env):
                 self.bank_capital += monthly_payment + principal_payment
                 self.outstanding_loan -= principal_payment
                 self.outstanding_loan = max(0, self.outstanding_loan)
+                self._report_loan(False)
         
         return False
     
@@ -200,11 +237,7 @@ class BankLendingEnv(gym.Env):
         
         if self.outstanding_loan <= 0:
             reward += 0.5
-            idx = self.rng.integers(0, self.n_customers)
-            self.current_customer = self.customer_pool.iloc[idx].to_dict()
-            self.outstanding_loan = self.current_customer['loan_amount']
-            self.interest_rate = self.current_customer['base_interest']
-            self.pd_score = self.current_customer['pd_score']
+            self._draw_customer()
         
         if self.current_step >= self.MAX_MONTHS:
             truncated = True
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+POOL_COLUMNS = ['pd_score', 'income', 'credit_amount', 'annuity', 'ext_source', 'loan_amount', 'base_interest', 'duration']
+
+DEFAULT_DURATION = 24
+
+
+class CustomerPool:
+
+    def __init__(self, columns, index=None):
+        n = len(columns['pd_score'])
+        self.columns = {}
+        for c in POOL_COLUMNS:
+            if c in columns:
+                self.columns[c] = np.ascontiguousarray(columns[c], dtype=np.float32)
+            elif c == 'duration':
+                self.columns[c] = np.full(n, DEFAULT_DURATION, dtype=np.float32)
+            else:
+                raise KeyError(f"customer pool is missing column '{c}'")
+        self.index = np.arange(n) if index is None else np.asarray(index)
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def row(self, idx):
+        return {c: float(v[idx]) for c, v in self.columns.items()}
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns, index=self.index)
+
+    @classmethod
+    def from_frame(cls, df, index_col=None):
+        index = df[index_col].to_numpy() if index_col else df.index.to_numpy()
+        return cls({c: df[c].to_numpy() for c in POOL_COLUMNS if c in df.columns}, index=index)
+
+    @classmethod
+    def synthetic(cls, n, rng):
+        return cls({
+            'pd_score': rng.beta(2, 10, n),
+            'income': rng.lognormal(11, 0.8, n),
+            'credit_amount': rng.lognormal(12, 0.5, n),
+            'annuity': rng.lognormal(9, 0.5, n),
+            'ext_source': rng.beta(5, 3, n),
+            'loan_amount': rng.lognormal(11.5, 0.6, n),
+            'base_interest': rng.uniform(0.05, 0.15, n),
+            'duration': rng.integers(12, 48, n)
+        })
+
+    @classmethod
+    def from_retail_features(cls, df, pd_scores=None):
+        credit = df['AMT_CREDIT'].to_numpy(dtype=float)
+        annuity = df['AMT_ANNUITY'].to_numpy(dtype=float) if 'AMT_ANNUITY' in df.columns else credit / DEFAULT_DURATION
+        ext_cols = [c for c in ['EXT_SOURCE_1', 'EXT_SOURCE_2', 'EXT_SOURCE_3'] if c in df.columns]
+        ext_source = df[ext_cols].mean(axis=1).fillna(0.5).to_numpy() if ext_cols else np.full(len(df), 0.5)
+        if pd_scores is None and 'PREDICTION' in df.columns:
+            pd_scores = df['PREDICTION'].to_numpy()
+        if pd_scores is None:
+            pd_scores = 0.5 * (1.0 - ext_source)
+        pd_scores = np.clip(np.asarray(pd_scores, dtype=float), 0.001, 0.99)
+        index = df['SK_ID_CURR'].to_numpy() if 'SK_ID_CURR' in df.columns else None
+        return cls({
+            'pd_score': pd_scores,
+            'income': df['AMT_INCOME_TOTAL'].to_numpy(dtype=float),
+            'credit_amount': credit,
+            'annuity': annuity,
+            'ext_source': ext_source,
+            'loan_amount': credit,
+            'base_interest': np.clip(0.05 + 0.5 * pd_scores, 0.05, 0.15),
+            'duration': np.clip(np.round(credit / np.maximum(annuity, 1.0)), 12, 48),
+        }, index=index)
+
+    @classmethod
+    def from_sme(cls, static_df, monthly_df=None):
+        loan = static_df['loan_amount'].to_numpy(dtype=float)
+        rate = static_df['interest_rate'].to_numpy(dtype=float)
+        dur = static_df['duration'].to_numpy(dtype=float)
+        debt_ratio = static_df['debt_ratio'].to_numpy(dtype=float)
+        r_m = rate / 12
+        f = (1 + r_m) ** dur
+        annuity = np.where(r_m > 0, loan * r_m * f / np.maximum(f - 1, 1e-12), loan / dur)
+        pd_col = None
+        if monthly_df is not None:
+            pd_col = 'PD' if 'PD' in monthly_df.columns else None
+        if pd_col:
+            pd_scores = monthly_df.groupby('SME_ID')[pd_col].mean().reindex(static_df['SME_ID']).to_numpy()
+            pd_scores = np.where(np.isnan(pd_scores), 0.05, pd_scores)
+        else:
+            pd_scores = 1 / (1 + np.exp(-(-4.0 + 3.0 * debt_ratio)))
+        return cls({
+            'pd_score': np.clip(pd_scores, 0.001, 0.99),
+            'income': static_df['base_revenue'].to_numpy(dtype=float),
+            'credit_amount': loan,
+            'annuity': annuity,
+            'ext_source': 1.0 - debt_ratio,
+            'loan_amount': loan,
+            'base_interest': rate,
+            'duration': dur,
+        }, index=static_df['SME_ID'].to_numpy())
+
+    @classmethod
+    def from_parquet(cls, path, monthly_path=None, pd_scores=None):
+        df = pd.read_parquet(path)
+        if 'SME_ID' in df.columns:
+            monthly = pd.read_parquet(monthly_path) if monthly_path else None
+            return cls.from_sme(df, monthly)
+        return cls.from_retail_features(df, pd_scores=pd_scores)
+
+    @classmethod
+    def coerce(cls, customer_data, rng=None, n=1000):
+        if customer_data is None:
+            return cls.synthetic(n, rng if rng is not None else np.random.default_rng())
+        if isinstance(customer_data, cls):
+            return customer_data
+        return cls.from_frame(customer_data)
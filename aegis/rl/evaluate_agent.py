@@ -6,15 +6,19 @@ sys.modules["cv2"] = MagicMock()
 import os
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from stable_baselines3 import PPO
-from src.rl.bank_env import BankLendingEnv
+from aegis.rl.bank_env import BankLendingEnv
 
 MODEL_DIR = 'models'
 RESULTS_DIR = 'outputs'
 N_EVAL = 1000
+N_WORKERS = int(os.environ.get('AEGIS_EVAL_WORKERS', os.cpu_count() or 1))
+N_LANES = 64
+INDEPENDENT_EPISODES = os.environ.get('AEGIS_EVAL_INDEPENDENT', '0') == '1'
 
 def rule_based_strategy(obs, env):
     
@@ -34,7 +38,7 @@ def pd_threshold_strategy(obs, env):
     else:
         return np.array([0.05, 0.5, 0.0], dtype=np.float32)
 
-def evaluate_strategy(strategy_fn, env, n_episodes, use_model=False, model=None):
+def summarize_episodes(records):
     
     total_profit = 0
     total_defaults = 0
@@ -42,8 +46,61 @@ def evaluate_strategy(strategy_fn, env, n_episodes, use_model=False, model=None)
     total_episodes = 0
     capital_history = []
     
-    for ep in range(n_episodes):
-        obs, info = env.reset(seed=ep)
+    for rec in records:
+        total_profit += rec['reward']
+        total_defaults += rec['defaults']
+        total_approved += rec['approved']
+        total_episodes += 1
+        capital_history.append(rec['final_capital'])
+    
+    avg_profit = total_profit / total_episodes
+    default_rate = total_defaults / max(1, total_approved)
+    risk_adj_return = avg_profit / (1 + default_rate)
+    
+    return {
+        'total_profit': total_profit,
+        'avg_profit': avg_profit,
+        'default_rate': default_rate,
+        'total_defaults': total_defaults,
+        'total_approved': total_approved,
+        'risk_adjusted_return': risk_adj_return,
+        'avg_final_capital': np.mean(capital_history)
+    }
+
+def confidence_intervals(records, level=0.95, n_boot=1000, seed=0):
+    
+    reward = np.array([r['reward'] for r in records], dtype=float)
+    defaults = np.array([r['defaults'] for r in records], dtype=float)
+    approved = np.array([r['approved'] for r in records], dtype=float)
+    capital = np.array([r['final_capital'] for r in records], dtype=float)
+    n = len(reward)
+    z = {0.9: 1.645, 0.95: 1.96, 0.99: 2.576}.get(level, 1.96)
+    
+    out = {}
+    for name, x in [('avg_profit', reward), ('avg_final_capital', capital)]:
+        half = z * x.std(ddof=1) / np.sqrt(n) if n > 1 else 0.0
+        out[f'{name}_ci_low'] = float(x.mean() - half)
+        out[f'{name}_ci_high'] = float(x.mean() + half)
+    
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(n_boot, n))
+    boot_profit = reward[idx].mean(axis=1)
+    boot_rate = defaults[idx].sum(axis=1) / np.maximum(1, approved[idx].sum(axis=1))
+    boot_rar = boot_profit / (1 + boot_rate)
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    for name, x in [('default_rate', boot_rate), ('risk_adjusted_return', boot_rar)]:
+        lo, hi = np.percentile(x, q)
+        out[f'{name}_ci_low'] = float(lo)
+        out[f'{name}_ci_high'] = float(hi)
+    return out
+
+def evaluate_episodes(strategy_fn, env, seeds, use_model=False, model=None, reset_capital=False):
+    
+    options = {'reset_capital': True} if reset_capital else None
+    records = []
+    
+    for ep in seeds:
+        obs, info = env.reset(seed=int(ep), options=options)
         ep_reward = 0
         ep_defaults = 0
         ep_approved = 0
@@ -65,27 +122,100 @@ def evaluate_strategy(strategy_fn, env, n_episodes, use_model=False, model=None)
             if terminated or truncated:
                 break
         
-        total_profit += ep_reward
-        total_defaults += ep_defaults
-        total_approved += ep_approved
-        total_episodes += 1
-        capital_history.append(env.bank_capital)
+        records.append({'episode': int(ep), 'reward': ep_reward, 'defaults': ep_defaults,
+                        'approved': ep_approved, 'final_capital': env.bank_capital})
     
-    avg_profit = total_profit / total_episodes
-    default_rate = total_defaults / max(1, total_approved)
-    risk_adj_return = avg_profit / (1 + default_rate)
+    return records
+
+def evaluate_strategy(strategy_fn, env, n_episodes, use_model=False, model=None, reset_capital=False):
     
-    return {
-        'total_profit': total_profit,
-        'avg_profit': avg_profit,
-        'default_rate': default_rate,
-        'total_defaults': total_defaults,
-        'total_approved': total_approved,
-        'risk_adjusted_return': risk_adj_return,
-        'avg_final_capital': np.mean(capital_history)
-    }
+    records = evaluate_episodes(strategy_fn, env, range(n_episodes), use_model, model, reset_capital)
+    return summarize_episodes(records)
+
+STRATEGIES = {
+    'rule_based': rule_based_strategy,
+    'pd_threshold': pd_threshold_strategy,
+}
+
+_worker_model = {}
+
+def _init_worker():
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except Exception:
+        pass
+
+def _load_model(model_path):
+    if model_path not in _worker_model:
+        _worker_model[model_path] = PPO.load(model_path, device='cpu')
+    return _worker_model[model_path]
+
+def _run_shard(strategy, seeds, env_kwargs, model_path, n_lanes):
+    
+    template = BankLendingEnv(**env_kwargs)
+    lane_kwargs = dict(env_kwargs, customer_data=template.customer_pool)
+    envs = [template] + [BankLendingEnv(**lane_kwargs) for _ in range(max(0, min(n_lanes, len(seeds)) - 1))]
+    model = _load_model(model_path) if model_path else None
+    strategy_fn = STRATEGIES.get(strategy)
+    options = {'reset_capital': True}
+    records = []
+    
+    for start in range(0, len(seeds), len(envs)):
+        batch = seeds[start:start + len(envs)]
+        lanes = envs[:len(batch)]
+        obs = [env.reset(seed=int(ep), options=options)[0] for env, ep in zip(lanes, batch)]
+        recs = [{'episode': int(ep), 'reward': 0, 'defaults': 0, 'approved': 0, 'final_capital': 0.0} for ep in batch]
+        active = list(range(len(batch)))
+        
+        for step in range(template.MAX_MONTHS):
+            if not active:
+                break
+            if model is not None:
+                actions, _ = model.predict(np.stack([obs[i] for i in active]), deterministic=True)
+            else:
+                actions = [strategy_fn(obs[i], lanes[i]) for i in active]
+            
+            still_active = []
+            for i, action in zip(active, actions):
+                obs[i], reward, terminated, truncated, info = lanes[i].step(action)
+                recs[i]['reward'] += reward
+                if action[2] > 0.5:
+                    recs[i]['approved'] += 1
+                if info.get('defaulted', False):
+                    recs[i]['defaults'] += 1
+                if not (terminated or truncated):
+                    still_active.append(i)
+            active = still_active
+        
+        for i, env in enumerate(lanes):
+            recs[i]['final_capital'] = env.bank_capital
+        records.extend(recs)
+    
+    return records
 
-def main():
+def evaluate_strategy_parallel(strategy, n_episodes, env_kwargs=None, model_path=None,
+                               n_workers=N_WORKERS, n_lanes=N_LANES, level=0.95):
+    
+    env_kwargs = env_kwargs or {'seed': 42}
+    seeds = list(range(n_episodes))
+    n_workers = max(1, min(n_workers, n_episodes))
+    shards = [seeds[k::n_workers] for k in range(n_workers)]
+    
+    if n_workers == 1:
+        _init_worker()
+        parts = [_run_shard(strategy, shards[0], env_kwargs, model_path, n_lanes)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_run_shard, strategy, shard, env_kwargs, model_path, n_lanes) for shard in shards]
+            parts = [f.result() for f in futures]
+    
+    records = sorted((r for part in parts for r in part), key=lambda r: r['episode'])
+    metrics = summarize_episodes(records)
+    metrics.update(confidence_intervals(records, level=level))
+    return metrics
+
+def main(independent=INDEPENDENT_EPISODES):
     if not os.path.exists(RESULTS_DIR):
         os.makedirs(RESULTS_DIR)
     
@@ -99,21 +229,27 @@ def main():
     else:
         print(f"Warning: PPO model not found at {ppo_path}. Skipping PPO evaluation.")
     
+    if independent:
+        print(f"\nIndependent episodes on {N_WORKERS} workers, capital reset every episode.")
+        run = lambda name, fn, model=None: evaluate_strategy_parallel(name, N_EVAL, model_path=ppo_path if model else None)
+    else:
+        run = lambda name, fn, model=None: evaluate_strategy(fn, env, N_EVAL, use_model=model is not None, model=model)
+    
     results = {}
     
     print("\nEvaluating Rule-Based Strategy...")
-    results['rule_based'] = evaluate_strategy(rule_based_strategy, env, N_EVAL)
+    results['rule_based'] = run('rule_based', rule_based_strategy)
     print(f"  Profit: {results['rule_based']['total_profit']:.2f}")
     print(f"  Default Rate: {results['rule_based']['default_rate']:.4f}")
     
     print("\nEvaluating PD-Threshold Strategy...")
-    results['pd_threshold'] = evaluate_strategy(pd_threshold_strategy, env, N_EVAL)
+    results['pd_threshold'] = run('pd_threshold', pd_threshold_strategy)
     print(f"  Profit: {results['pd_threshold']['total_profit']:.2f}")
     print(f"  Default Rate: {results['pd_threshold']['default_rate']:.4f}")
     
     if ppo_model:
         print("\nEvaluating PPO Agent...")
-        results['ppo_agent'] = evaluate_strategy(None, env, N_EVAL, use_model=True, model=ppo_model)
+        results['ppo_agent'] = run('ppo_agent', None, ppo_model)
         print(f"  Profit: {results['ppo_agent']['total_profit']:.2f}")
         print(f"  Default Rate: {results['ppo_agent']['default_rate']:.4f}")
     
@@ -130,4 +266,4 @@ def main():
     print(df.to_string(index=False))
 
 if __name__ == "__main__":
-    main()
+    main(independent=INDEPENDENT_EPISODES or '--independent' in sys.argv[1:])
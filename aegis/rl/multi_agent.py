@@ -1,37 +1,67 @@
-
+from types import MappingProxyType
 import numpy as np
 
+N_DRAWS = 4
+
+def _normal_from_uniform(u0, u1):
+    return np.sqrt(-2.0 * np.log(1.0 - u0)) * np.cos(2.0 * np.pi * u1)
+
 class CustomerAgent:
     
     def __init__(self, risk_aversion=0.5, seed=42):
         self.risk_aversion = risk_aversion
         self.rng = np.random.default_rng(seed)
     
-    def decide(self, loan_amount, interest_rate, duration, pd_score):
+    def draw(self, n=None):
+        
+        if n is None:
+            return self.rng.random(N_DRAWS)
+        return self.rng.random((n, N_DRAWS))
+    
+    def decide(self, loan_amount, interest_rate, duration, pd_score, u=None):
         
         interest_cost = loan_amount * interest_rate * duration / 12
         
         utility = loan_amount - interest_cost - self.risk_aversion * pd_score * loan_amount
         
-        noise = self.rng.normal(0, loan_amount * 0.05)
+        if u is None:
+            u = self.rng.random(2)
+        noise = loan_amount * 0.05 * _normal_from_uniform(u[..., 0], u[..., 1])
         utility += noise
         
         return utility > 0
     
-    def get_counteroffer(self, loan_amount, interest_rate):
+    def get_counteroffer(self, loan_amount, interest_rate, u=None):
         
-        proposed_rate = interest_rate * self.rng.uniform(0.7, 0.95)
-        proposed_amount = loan_amount * self.rng.uniform(1.0, 1.2)
+        if u is None:
+            u = self.rng.random(2)
+        proposed_rate = interest_rate * (0.7 + 0.25 * u[..., 0])
+        proposed_amount = loan_amount * (1.0 + 0.2 * u[..., 1])
         return proposed_amount, proposed_rate
 
 
 class RegulatorAgent:
     
-    def __init__(self, min_car=0.08, max_portfolio_pd=0.15):
+    def __init__(self, min_car=0.08, max_portfolio_pd=0.15, max_industry_share=None, max_weighted_pd=None):
         self.min_car = min_car
         self.max_portfolio_pd = max_portfolio_pd
-        self.portfolio_loans = []
+        self.max_industry_share = max_industry_share
+        self.max_weighted_pd = max_weighted_pd
+        self.loans = {}
+        self._next_id = 0
+        self.exposure = 0.0
+        self.pd_exposure = 0.0
+        self.pd_sum = 0.0
+        self.n_loans = 0
+        self.industry_exposure = {}
         self.total_capital = 0
+        self._portfolio = None
+    
+    @property
+    def portfolio_loans(self):
+        if self._portfolio is None:
+            self._portfolio = tuple(MappingProxyType({'amount': a, 'pd': p}) for a, p, _ in self.loans.values())
+        return self._portfolio
     
     def update(self, bank_capital, total_exposure, avg_pd):
         
@@ -39,9 +69,9 @@ class RegulatorAgent:
         self.total_exposure = total_exposure
         self.avg_pd = avg_pd
     
-    def check_constraints(self, bank_capital, new_loan_amount, portfolio_pd):
+    def check_constraints(self, bank_capital, new_loan_amount, portfolio_pd, industry=None, new_loan_pd=None):
         
-        total_exposure = sum(l['amount'] for l in self.portfolio_loans) + new_loan_amount
+        total_exposure = self.exposure + new_loan_amount
         car = bank_capital / (total_exposure + 1e-8)
         
         penalty = 0
@@ -55,53 +85,137 @@ class RegulatorAgent:
             penalty += (portfolio_pd - self.max_portfolio_pd) * 5000
             approved = False
         
+        if self.max_industry_share is not None and industry is not None:
+            share = (self.industry_exposure.get(industry, 0.0) + new_loan_amount) / (total_exposure + 1e-8)
+            if share > self.max_industry_share:
+                penalty += (share - self.max_industry_share) * 5000
+                approved = False
+        
+        if self.max_weighted_pd is not None:
+            pd_exposure = self.pd_exposure + (new_loan_pd or 0.0) * new_loan_amount
+            weighted_pd = pd_exposure / (total_exposure + 1e-8)
+            if weighted_pd > self.max_weighted_pd:
+                penalty += (weighted_pd - self.max_weighted_pd) * 5000
+                approved = False
+        
         return approved, penalty
     
-    def add_loan(self, loan_amount, pd_score):
-        self.portfolio_loans.append({'amount': loan_amount, 'pd': pd_score})
+    def add_loan(self, loan_amount, pd_score, industry=None):
+        loan_id = self._next_id
+        self._next_id += 1
+        self.loans[loan_id] = (loan_amount, pd_score, industry)
+        self._portfolio = None
+        self.exposure += loan_amount
+        self.pd_exposure += pd_score * loan_amount
+        self.pd_sum += pd_score
+        self.n_loans += 1
+        if industry is not None:
+            self.industry_exposure[industry] = self.industry_exposure.get(industry, 0.0) + loan_amount
+        return loan_id
+    
+    def update_loan(self, loan_id, new_amount):
+        amount, pd_score, industry = self.loans[loan_id]
+        delta = new_amount - amount
+        self.loans[loan_id] = (new_amount, pd_score, industry)
+        self._portfolio = None
+        self.exposure += delta
+        self.pd_exposure += pd_score * delta
+        if industry is not None:
+            self.industry_exposure[industry] += delta
+    
+    def remove_loan(self, loan_id):
+        amount, pd_score, industry = self.loans.pop(loan_id)
+        self._portfolio = None
+        self.exposure -= amount
+        self.pd_exposure -= pd_score * amount
+        self.pd_sum -= pd_score
+        self.n_loans -= 1
+        if industry is not None:
+            self.industry_exposure[industry] -= amount
+        if not self.loans:
+            self.exposure = 0.0
+            self.pd_exposure = 0.0
+            self.pd_sum = 0.0
+            self.industry_exposure = {}
     
     def get_portfolio_pd(self):
-        if not self.portfolio_loans:
+        if not self.n_loans:
             return 0
-        return np.mean([l['pd'] for l in self.portfolio_loans])
+        return self.pd_sum / self.n_loans
+    
+    def get_weighted_pd(self):
+        if self.exposure <= 0:
+            return 0.0
+        return self.pd_exposure / self.exposure
+
 
+def benchmark_regulator(book_sizes=(1_000, 10_000, 100_000), n_checks=10_000, seed=42):
+    
+    import time
+    rng = np.random.default_rng(seed)
+    industries = ['Retail', 'Manufacturing', 'Tech', 'Services', 'Agriculture']
+    results = []
+    for n in book_sizes:
+        reg = RegulatorAgent(max_industry_share=0.4, max_weighted_pd=0.2)
+        amounts = rng.lognormal(11.5, 0.6, n)
+        pds = rng.beta(2, 10, n)
+        inds = rng.choice(industries, n)
+        for a, p, ind in zip(amounts, pds, inds):
+            reg.add_loan(float(a), float(p), ind)
+        t0 = time.perf_counter()
+        for k in range(n_checks):
+            reg.check_constraints(1e9, 1e5, reg.get_portfolio_pd(), industry='Tech', new_loan_pd=0.1)
+        per_check = (time.perf_counter() - t0) / n_checks
+        results.append({'book_size': n, 'us_per_check': per_check * 1e6})
+    return results
 
-def negotiate(bank_action, customer, regulator, env):
+def negotiate(bank_action, customer, regulator, env, industry=None):
     
     int_rate_adj = float(bank_action[0])
     loan_mult = float(bank_action[1])
     approve = float(bank_action[2]) > 0.5
     
     if not approve:
-        return False, bank_action, 0
+        return False, bank_action, 0, None
     
     current_rate = env.interest_rate + int_rate_adj
     current_loan = env.outstanding_loan * loan_mult
+    u = customer.draw()
     
     customer_accepts = customer.decide(
         current_loan, current_rate, 
         env.MAX_MONTHS - env.current_step,
-        env.pd_score
+        env.pd_score, u=u[:2]
     )
     
     if not customer_accepts:
-        counter_loan, counter_rate = customer.get_counteroffer(current_loan, current_rate)
+        counter_loan, counter_rate = customer.get_counteroffer(current_loan, current_rate, u=u[2:])
         margin = (1 - env.pd_score) * counter_rate - env.pd_score * env.LGD
         if margin > 0:
-            current_loan = counter_loan
-            current_rate = counter_rate
+            current_loan = float(counter_loan)
+            current_rate = float(counter_rate)
         else:
-            return False, bank_action, 0
+            return False, bank_action, 0, None
+    
+    loan_id = getattr(env, 'loan_id', None)
+    if getattr(env, 'regulator', None) is not regulator or loan_id not in regulator.loans:
+        loan_id = None
+    booked = regulator.loans[loan_id][0] if loan_id is not None else 0.0
     
     portfolio_pd = regulator.get_portfolio_pd()
     reg_approved, penalty = regulator.check_constraints(
-        env.bank_capital, current_loan, portfolio_pd
+        env.bank_capital, current_loan - booked, portfolio_pd, industry=industry, new_loan_pd=env.pd_score
     )
     
     if not reg_approved:
-        return False, bank_action, penalty
+        return False, bank_action, penalty, None
     
-    regulator.add_loan(current_loan, env.pd_score)
+    if loan_id is None:
+        loan_id = regulator.add_loan(current_loan, env.pd_score, industry)
+    else:
+        regulator.update_loan(loan_id, current_loan)
+    if hasattr(env, 'book_loan'):
+        env.book_loan(regulator, loan_id)
     
     adjusted = np.array([
         current_rate - env.interest_rate,
@@ -109,11 +223,101 @@ def negotiate(bank_action, customer, regulator, env):
         1.0
     ], dtype=np.float32)
     
-    return True, adjusted, penalty
+    return True, adjusted, penalty, loan_id
+
 
+def negotiate_batch(bank_actions, customer, regulator, interest_rate, outstanding_loan, duration, pd_score,
+                    bank_capital, lgd=0.6, regulator_mode='sequential', industry=None):
+    
+    bank_actions = np.asarray(bank_actions, dtype=np.float32)
+    n = len(bank_actions)
+    interest_rate = np.broadcast_to(np.asarray(interest_rate, dtype=float), (n,))
+    outstanding_loan = np.broadcast_to(np.asarray(outstanding_loan, dtype=float), (n,))
+    duration = np.broadcast_to(np.asarray(duration, dtype=float), (n,))
+    pd_score = np.broadcast_to(np.asarray(pd_score, dtype=float), (n,))
+    bank_capital = np.broadcast_to(np.asarray(bank_capital, dtype=float), (n,))
+    
+    industry = np.broadcast_to(np.asarray(industry, dtype=object), (n,))
+    
+    approved = np.zeros(n, dtype=bool)
+    penalties = np.zeros(n)
+    loan_ids = np.full(n, -1, dtype=np.int64)
+    adjusted = bank_actions.copy()
+    
+    cand = np.flatnonzero(bank_actions[:, 2].astype(float) > 0.5)
+    if len(cand) == 0:
+        return approved, adjusted, penalties, loan_ids
+    
+    u = customer.draw(len(cand))
+    rate0 = interest_rate[cand]
+    loan0 = outstanding_loan[cand]
+    pd_c = pd_score[cand]
+    current_rate = rate0 + bank_actions[cand, 0].astype(float)
+    current_loan = loan0 * bank_actions[cand, 1].astype(float)
+    
+    accepts = customer.decide(current_loan, current_rate, duration[cand], pd_c, u=u[:, :2])
+    counter_loan, counter_rate = customer.get_counteroffer(current_loan, current_rate, u=u[:, 2:])
+    margin = (1 - pd_c) * counter_rate - pd_c * lgd
+    take_counter = ~accepts & (margin > 0)
+    current_loan = np.where(take_counter, counter_loan, current_loan)
+    current_rate = np.where(take_counter, counter_rate, current_rate)
+    live = accepts | take_counter
+    
+    idx = cand[live]
+    loans = current_loan[live]
+    rates = current_rate[live]
+    pds = pd_c[live]
+    inds = industry[idx]
+    booked = np.full(len(idx), -1, dtype=np.int64)
+    if regulator_mode == 'snapshot':
+        portfolio_pd = regulator.get_portfolio_pd()
+        total_exposure = regulator.exposure + loans
+        car = bank_capital[idx] / (total_exposure + 1e-8)
+        pen = np.where(car < regulator.min_car, (regulator.min_car - car) * 10000, 0.0)
+        ok = car >= regulator.min_car
+        if portfolio_pd > regulator.max_portfolio_pd:
+            pen = pen + (portfolio_pd - regulator.max_portfolio_pd) * 5000
+            ok[:] = False
+        if regulator.max_weighted_pd is not None:
+            wpd = (regulator.pd_exposure + pds * loans) / (total_exposure + 1e-8)
+            pen = pen + np.where(wpd > regulator.max_weighted_pd, (wpd - regulator.max_weighted_pd) * 5000, 0.0)
+            ok &= wpd <= regulator.max_weighted_pd
+        if regulator.max_industry_share is not None:
+            has = np.array([x is not None for x in inds], dtype=bool)
+            held = np.array([regulator.industry_exposure.get(x, 0.0) if x is not None else 0.0 for x in inds])
+            share = (held + loans) / (total_exposure + 1e-8)
+            over = has & (share > regulator.max_industry_share)
+            pen = pen + np.where(over, (share - regulator.max_industry_share) * 5000, 0.0)
+            ok &= ~over
+        penalties[idx] = pen
+        for i in np.flatnonzero(ok):
+            booked[i] = regulator.add_loan(float(loans[i]), float(pds[i]), inds[i])
+    else:
+        ok = np.zeros(len(idx), dtype=bool)
+        for i in range(len(idx)):
+            reg_ok, pen = regulator.check_constraints(
+                float(bank_capital[idx[i]]), float(loans[i]), regulator.get_portfolio_pd(), industry=inds[i],
+                new_loan_pd=float(pds[i])
+            )
+            penalties[idx[i]] = pen
+            if reg_ok:
+                booked[i] = regulator.add_loan(float(loans[i]), float(pds[i]), inds[i])
+                ok[i] = True
+    
+    acc = idx[ok]
+    approved[acc] = True
+    adjusted[acc, 0] = rates[ok] - interest_rate[acc]
+    adjusted[acc, 1] = loans[ok] / (outstanding_loan[acc] + 1e-8)
+    adjusted[acc, 2] = 1.0
+    loan_ids[acc] = booked[ok]
+    
+    return approved, adjusted, penalties, loan_ids
 
 if __name__ == "__main__":
-    from src.rl.bank_env import BankLendingEnv
+    import os
+    import sys
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    from aegis.rl.bank_env import BankLendingEnv
     
     env = BankLendingEnv(seed=42)
     customer = CustomerAgent(seed=42)
@@ -124,10 +328,14 @@ if __name__ == "__main__":
     print("Multi-Agent Negotiation Test:")
     for i in range(5):
         bank_action = env.action_space.sample()
-        approved, final_action, penalty = negotiate(bank_action, customer, regulator, env)
+        approved, final_action, penalty, loan_id = negotiate(bank_action, customer, regulator, env)
         obs, reward, term, trunc, info = env.step(final_action)
-        print(f"  Round {i+1}: Bank proposal -> Approved={approved}, Penalty={penalty:.2f}, Reward={reward:.4f}")
+        print(f"  Round {i+1}: Bank proposal -> Approved={approved}, Penalty={penalty:.2f}, Reward={reward:.4f}, "
+              f"book {regulator.n_loans} loans / {regulator.exposure:.0f}")
         if term or trunc:
             break
     
     print("Multi-agent test passed!")
+    
+    for r in benchmark_regulator():
+        print(f"  book={r['book_size']:>7}: {r['us_per_check']:.2f} us per constraint check")
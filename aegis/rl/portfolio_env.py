@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import numpy as np
+from gymnasium import spaces
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from aegis.rl.bank_env import BankLendingEnv
+
+
+class LoanBook:
+
+    def __init__(self, capacity=1024):
+        self.capacity = max(1, int(capacity))
+        self.amount = np.zeros(self.capacity)
+        self.rate = np.zeros(self.capacity)
+        self.pd = np.zeros(self.capacity)
+        self.months = np.zeros(self.capacity, dtype=np.int32)
+        self.n = 0
+        self.exposure = 0.0
+        self.pd_exposure = 0.0
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def portfolio_pd(self):
+        return self.pd_exposure / self.exposure if self.exposure > 0 else 0.0
+
+    def clear(self):
+        self.n = 0
+        self.exposure = 0.0
+        self.pd_exposure = 0.0
+
+    def _grow(self, needed):
+        cap = self.capacity
+        while cap < needed:
+            cap *= 2
+        if cap == self.capacity:
+            return
+        for name in ('amount', 'rate', 'pd', 'months'):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+        self.capacity = cap
+
+    def add(self, amount, rate, pd, months):
+        amount = np.atleast_1d(np.asarray(amount, dtype=float))
+        k = len(amount)
+        if k == 0:
+            return
+        self._grow(self.n + k)
+        s = slice(self.n, self.n + k)
+        pd = np.broadcast_to(np.asarray(pd, dtype=float), (k,))
+        self.amount[s] = amount
+        self.rate[s] = rate
+        self.pd[s] = pd
+        self.months[s] = np.maximum(1, np.asarray(months))
+        self.n += k
+        self.exposure += float(amount.sum())
+        self.pd_exposure += float(pd @ amount)
+
+    def step(self, rng, lgd, pd_shift=0.0):
+        n = self.n
+        if n == 0:
+            return {'interest': 0.0, 'principal': 0.0, 'loss': 0.0, 'recovery': 0.0, 'n_defaults': 0, 'n_matured': 0}
+        a = self.amount[:n]
+        r = self.rate[:n]
+        p = self.pd[:n]
+        m = self.months[:n]
+
+        p_eff = np.clip(p + pd_shift, 0.001, 0.99)
+        defaulted = rng.random(n) < p_eff / 12.0
+        alive = ~defaulted
+
+        interest = a * r / 12
+        principal = a / m
+        interest_total = float(interest @ alive)
+        principal_total = float(principal @ alive)
+        written_off = float(a @ defaulted)
+        loss = lgd * written_off
+
+        a_next = np.where(alive, np.maximum(0.0, a - principal), 0.0)
+        m -= 1
+        keep = alive & (m > 0) & (a_next > 0)
+
+        delta = a - np.where(keep, a_next, 0.0)
+        self.exposure -= float(delta.sum())
+        self.pd_exposure -= float(p @ delta)
+        a[:] = a_next
+
+        n_matured = int((alive & ~keep).sum())
+        if not keep.all():
+            k = int(keep.sum())
+            for arr in (self.amount, self.rate, self.pd, self.months):
+                arr[:k] = arr[:n][keep]
+            self.n = k
+        if self.n == 0:
+            self.exposure = 0.0
+            self.pd_exposure = 0.0
+
+        return {
+            'interest': interest_total,
+            'principal': principal_total,
+            'loss': loss,
+            'recovery': written_off - loss,
+            'n_defaults': int(defaulted.sum()),
+            'n_matured': n_matured,
+        }
+
+    def recompute_totals(self):
+        a = self.amount[:self.n]
+        self.exposure = float(a.sum())
+        self.pd_exposure = float(self.pd[:self.n] @ a)
+
+
+class PortfolioLendingEnv(BankLendingEnv):
+
+    def __init__(self, customer_data=None, config=None, seed=42):
+        super().__init__(customer_data=customer_data, config=config, seed=seed)
+        self.APPLICANTS_PER_STEP = self.config.get('applicants_per_step', 1)
+        self.INITIAL_BOOK_SIZE = self.config.get('initial_book_size', 0)
+        self.CAPITAL_RATIO = self.config.get('capital_ratio', 0.08)
+        self.MAX_EXPOSURE = self.config.get('max_exposure', 1e10)
+
+        self.state_dim = 13
+        self.observation_space = spaces.Box(low=-1.0, high=1.0, shape=(self.state_dim,), dtype=np.float32)
+        self._state_low = np.append(self._state_low, [0, 0])
+        self._state_high = np.append(self._state_high, [self.MAX_EXPOSURE, 1])
+
+        self.book = LoanBook(capacity=max(1024, 2 * self.INITIAL_BOOK_SIZE))
+        self.applicant_idx = np.zeros(self.APPLICANTS_PER_STEP, dtype=np.int64)
+        self.capital_held = 0.0
+
+    def _draw_applicants(self):
+        self.applicant_idx = self.rng.integers(0, self.n_customers, size=self.APPLICANTS_PER_STEP)
+        self.customer_idx = int(self.applicant_idx[0])
+        p = self.customer_pool
+        self.outstanding_loan = float(p.loan_amount[self.applicant_idx].mean())
+        self.interest_rate = float(p.base_interest[self.applicant_idx].mean())
+        self.pd_score = float(p.pd_score[self.applicant_idx].mean())
+
+    def _seed_book(self, n):
+        p = self.customer_pool
+        idx = self.rng.integers(0, self.n_customers, size=n)
+        duration = p.duration[idx].astype(np.int32)
+        months = self.rng.integers(1, np.maximum(2, duration + 1))
+        amount = p.loan_amount[idx] * months / np.maximum(duration, 1)
+        self.book.add(amount, p.base_interest[idx], p.pd_score[idx], months)
+        charge = self.CAPITAL_RATIO * self.book.pd_exposure - self.capital_held
+        self.bank_capital -= charge
+        self.capital_held += charge
+
+    def _get_state(self):
+        p = self.customer_pool
+        idx = self.applicant_idx
+        raw = np.array([
+            self.pd_score,
+            self.outstanding_loan,
+            self.interest_rate,
+            p.income[idx].mean(),
+            p.credit_amount[idx].mean(),
+            p.annuity[idx].mean(),
+            p.ext_source[idx].mean(),
+            p.duration[idx].mean(),
+            self.bank_capital,
+            self.risk_budget,
+            self.macro_factor,
+            self.book.exposure,
+            self.book.portfolio_pd,
+        ], dtype=np.float64)
+        return self._normalize(raw, self._state_low, self._state_high).astype(np.float32)
+
+    def reset(self, seed=None, options=None):
+        held = self.capital_held
+        super().reset(seed=seed, options=options)
+        if not (options and options.get('reset_capital', False)):
+            self.bank_capital += held
+        self.book.clear()
+        self.capital_held = 0.0
+        if self.INITIAL_BOOK_SIZE:
+            self._seed_book(self.INITIAL_BOOK_SIZE)
+        self._draw_applicants()
+        return self._get_state(), {}
+
+    def step(self, action):
+        self.current_step += 1
+
+        int_rate_adj = float(action[0])
+        loan_multiplier = float(action[1])
+        approve = float(action[2]) > 0.5
+
+        macro_adj = (1 - self.macro_factor) * 0.05
+        capital_charge = 0.0
+        if approve:
+            p = self.customer_pool
+            idx = self.applicant_idx
+            amount = p.loan_amount[idx] * loan_multiplier
+            rate = np.clip(p.base_interest[idx] + int_rate_adj, 0.01, 0.25)
+            pd = np.clip(p.pd_score[idx] + 0.02 * int_rate_adj / 0.05 + macro_adj, 0.001, 0.99)
+            self.book.add(amount, rate, pd, p.duration[idx].astype(np.int32))
+            capital_charge = self.CAPITAL_RATIO * float(pd @ amount)
+            self.bank_capital -= capital_charge
+            self.capital_held += capital_charge
+            self.n_approved += len(idx)
+            self.risk_budget = max(0, self.risk_budget - float(pd.sum()) * 0.005)
+
+        flows = self.book.step(self.rng, self.LGD, macro_adj)
+        cash_flow = flows['interest'] + flows['principal'] + flows['recovery'] - flows['loss']
+        self.bank_capital += cash_flow
+        self.n_defaults += flows['n_defaults']
+
+        capital_required = self.CAPITAL_RATIO * self.book.pd_exposure
+        self.bank_capital += self.capital_held - capital_required
+        self.capital_held = capital_required
+
+        raw_reward = flows['interest'] - flows['loss'] - self.RISK_LAMBDA * capital_charge
+        reward = float(np.clip(raw_reward / self.REWARD_SCALE, -10, 10))
+        if not approve:
+            reward -= 0.01
+
+        self.macro_factor += self.rng.normal(0, 0.02)
+        self.macro_factor = float(np.clip(self.macro_factor, 0.7, 1.3))
+
+        terminated = False
+        truncated = False
+        if self.current_step >= self.MAX_MONTHS:
+            truncated = True
+        elif self.bank_capital <= 0:
+            terminated = True
+            reward = -10.0
+
+        self._draw_applicants()
+
+        info = {
+            'profit': self.total_profit,
+            'defaulted': flows['n_defaults'] > 0,
+            'bank_capital': self.bank_capital,
+            'n_defaults': self.n_defaults,
+            'n_approved': self.n_approved,
+            'n_loans': len(self.book),
+            'exposure': self.book.exposure,
+            'portfolio_pd': self.book.portfolio_pd,
+            'capital_required': capital_required,
+            'capital_held': self.capital_held,
+            'cash_flow': cash_flow,
+            'car': self.bank_capital / (self.book.exposure + 1e-8),
+        }
+        self.total_profit += reward
+
+        return self._get_state(), reward, terminated, truncated, info
+
+
+if __name__ == "__main__":
+    for book_size in (10_000, 100_000):
+        env = PortfolioLendingEnv(seed=42, config={'initial_book_size': book_size, 'applicants_per_step': 100,
+                                                    'initial_capital': 1e10})
+        obs, _ = env.reset(seed=0)
+        funds = env.bank_capital + env.capital_held
+        cash = 0.0
+        n_steps = 0
+        t0 = time.perf_counter()
+        for _ in range(env.MAX_MONTHS):
+            obs, reward, terminated, truncated, info = env.step(np.array([0.0, 1.0, 1.0], dtype=np.float32))
+            cash += info['cash_flow']
+            n_steps += 1
+            if terminated or truncated:
+                break
+        dt = time.perf_counter() - t0
+        drift = env.bank_capital + env.capital_held - funds - cash
+        assert abs(drift) <= 1e-6 * max(abs(funds), 1.0), f"capital leaked: {drift:.2f}"
+        env.book.recompute_totals()
+        print(f"book={book_size:>7}: {n_steps / dt:8.1f} steps/s | live loans {info['n_loans']} | "
+              f"exposure {info['exposure']:.0f} (recomputed {env.book.exposure:.0f}) | portfolio PD {info['portfolio_pd']:.4f}")
+        before = env.bank_capital + env.capital_held
+        env.reset()
+        assert abs(env.bank_capital + env.capital_held - before) <= 1e-6 * max(abs(before), 1.0), "capital leaked on reset"
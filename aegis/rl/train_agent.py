@@ -4,19 +4,30 @@ from unittest.mock import MagicMock
 sys.modules["cv2"] = MagicMock()
 
 import os
+import re
 import sys
+import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.callbacks import EvalCallback
-from src.rl.bank_env import BankLendingEnv
+from stable_baselines3.common.vec_env import SubprocVecEnv, DummyVecEnv, VecMonitor
+from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback, CallbackList
+from aegis.rl.bank_env import BankLendingEnv
+from aegis.rl.vec_bank_env import VecBankLendingEnv
+from aegis.rl.evaluate_agent import evaluate_strategy_parallel
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 MODEL_DIR = 'models'
+CHECKPOINT_DIR = os.path.join(MODEL_DIR, 'checkpoints')
+CHECKPOINT_PREFIX = 'ppo_lending'
+TOTAL_TIMESTEPS = 2_000_000
+N_ENVS = os.cpu_count() or 1
+TARGET_REWARD = 0.6
+PARALLEL = os.environ.get('AEGIS_TRAIN_PARALLEL', '0') == '1'
 
 def train():
     if not os.path.exists(MODEL_DIR):
@@ -47,5 +58,151 @@ def train():
     
     print("PPO Training Complete!")
 
+class ThroughputCallback(BaseCallback):
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.t_start = None
+        self.t_last = None
+        self.steps_last = 0
+
+    def _on_training_start(self):
+        self.t_start = self.t_last = time.perf_counter()
+        self.steps_last = self.num_timesteps
+
+    def _on_rollout_end(self):
+        now = time.perf_counter()
+        sps = (self.num_timesteps - self.steps_last) / max(now - self.t_last, 1e-9)
+        self.logger.record('time/steps_per_sec', sps)
+        logger.info(f"{self.num_timesteps} steps | {sps:.0f} steps/s | {now - self.t_start:.0f}s elapsed")
+        self.t_last = now
+        self.steps_last = self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+class ParallelEvalCallback(BaseCallback):
+
+    def __init__(self, eval_freq, n_eval_episodes=200, n_workers=N_ENVS, target_reward=TARGET_REWARD,
+                 save_dir=CHECKPOINT_DIR, stop_on_target=False, verbose=0):
+        super().__init__(verbose)
+        self.eval_freq = eval_freq
+        self.n_eval_episodes = n_eval_episodes
+        self.n_workers = n_workers
+        self.target_reward = target_reward
+        self.save_dir = save_dir
+        self.stop_on_target = stop_on_target
+        self.t_start = None
+        self.last_eval = 0
+        self.best_reward = -float('inf')
+        self.time_to_target = None
+        self.history = []
+
+    def _on_training_start(self):
+        self.t_start = time.perf_counter()
+        self.last_eval = self.num_timesteps
+
+    def _on_step(self):
+        if self.num_timesteps - self.last_eval < self.eval_freq:
+            return True
+        self.last_eval = self.num_timesteps
+        path = os.path.join(self.save_dir, f'{CHECKPOINT_PREFIX}_eval_{self.num_timesteps}_steps.zip')
+        self.model.save(path)
+        metrics = evaluate_strategy_parallel('ppo_agent', self.n_eval_episodes, model_path=path, n_workers=self.n_workers)
+        os.remove(path)
+        elapsed = time.perf_counter() - self.t_start
+        reward = metrics['avg_profit']
+        self.history.append({'timesteps': self.num_timesteps, 'elapsed': elapsed, **metrics})
+        self.logger.record('eval/avg_profit', reward)
+        self.logger.record('eval/default_rate', metrics['default_rate'])
+        logger.info(f"eval @ {self.num_timesteps}: avg_profit={reward:.4f} "
+                    f"[{metrics['avg_profit_ci_low']:.4f}, {metrics['avg_profit_ci_high']:.4f}] "
+                    f"default_rate={metrics['default_rate']:.4f}")
+        if reward > self.best_reward:
+            self.best_reward = reward
+            self.model.save(os.path.join(MODEL_DIR, 'ppo_lending_agent_best'))
+        if self.time_to_target is None and reward >= self.target_reward:
+            self.time_to_target = elapsed
+            logger.info(f"target reward {self.target_reward} reached after {elapsed:.0f}s ({self.num_timesteps} steps)")
+            if self.stop_on_target:
+                return False
+        return True
+
+def latest_checkpoint(checkpoint_dir=CHECKPOINT_DIR, prefix=CHECKPOINT_PREFIX):
+    if not os.path.isdir(checkpoint_dir):
+        return None, 0
+    pattern = re.compile(rf'^{prefix}_(\d+)_steps\.zip$')
+    found = [(int(m.group(1)), f) for f in os.listdir(checkpoint_dir) for m in [pattern.match(f)] if m]
+    if not found:
+        return None, 0
+    steps, name = max(found)
+    return os.path.join(checkpoint_dir, name), steps
+
+def make_training_env(n_envs=N_ENVS, backend='subproc', seed=42):
+    if backend == 'native':
+        return VecMonitor(VecBankLendingEnv(n_envs=n_envs, seed=seed))
+    vec_env_cls = SubprocVecEnv if backend == 'subproc' and n_envs > 1 else DummyVecEnv
+    return make_vec_env(BankLendingEnv, n_envs=n_envs, seed=seed, vec_env_cls=vec_env_cls, env_kwargs={'seed': seed})
+
+def train_parallel(total_timesteps=TOTAL_TIMESTEPS, n_envs=N_ENVS, backend='subproc', seed=42,
+                   checkpoint_every=100_000, eval_every=200_000, n_eval_episodes=200,
+                   target_reward=TARGET_REWARD, resume=True):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+
+    logger.info(f"Creating {n_envs} {backend} environments...")
+    env = make_training_env(n_envs, backend, seed)
+
+    ckpt_path, ckpt_steps = latest_checkpoint() if resume else (None, 0)
+    if ckpt_path:
+        logger.info(f"Resuming from {ckpt_path} ({ckpt_steps} steps)")
+        model = PPO.load(ckpt_path, env=env, device='cpu')
+    else:
+        logger.info("Initializing PPO agent...")
+        model = PPO(
+            "MlpPolicy",
+            env,
+            verbose=1,
+            seed=seed,
+            gamma=0.99,
+            learning_rate=3e-4,
+            batch_size=256,
+            n_steps=max(64, 2048 // n_envs),
+            n_epochs=10,
+            device='cpu'
+        )
+
+    remaining = total_timesteps - model.num_timesteps
+    if remaining <= 0:
+        logger.info(f"Checkpoint already has {model.num_timesteps} steps, nothing to train.")
+        return model
+
+    throughput = ThroughputCallback()
+    evaluator = ParallelEvalCallback(eval_every, n_eval_episodes=n_eval_episodes, n_workers=n_envs,
+                                     target_reward=target_reward)
+    checkpoints = CheckpointCallback(save_freq=max(1, checkpoint_every // n_envs), save_path=CHECKPOINT_DIR,
+                                     name_prefix=CHECKPOINT_PREFIX)
+
+    logger.info(f"Training for {remaining} timesteps...")
+    t0 = time.perf_counter()
+    model.learn(total_timesteps=remaining, callback=CallbackList([checkpoints, throughput, evaluator]),
+                reset_num_timesteps=not ckpt_path)
+    elapsed = time.perf_counter() - t0
+
+    save_path = os.path.join(MODEL_DIR, 'ppo_lending_agent')
+    model.save(save_path)
+    env.close()
+    logger.info(f"Agent saved to {save_path}.zip")
+    logger.info(f"{remaining} steps in {elapsed:.0f}s ({remaining / max(elapsed, 1e-9):.0f} steps/s)")
+    if evaluator.time_to_target is not None:
+        logger.info(f"Wall-clock to target reward {target_reward}: {evaluator.time_to_target:.0f}s")
+    else:
+        logger.info(f"Target reward {target_reward} not reached (best {evaluator.best_reward:.4f})")
+
+    print("PPO Training Complete!")
+    return model
+
 if __name__ == "__main__":
-    train()
+    if PARALLEL or '--parallel' in sys.argv[1:]:
+        train_parallel()
+    else:
+        train()
@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+import numpy as np
+from gymnasium import spaces
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from aegis.rl.bank_env import BankLendingEnv
+from aegis.rl.customer_pool import CustomerPool
+
+try:
+    from stable_baselines3.common.vec_env import VecEnv
+except Exception:
+    VecEnv = None
+
+LANE_FIELDS = [
+    'customer_idx', 'current_step', 'outstanding_loan', 'interest_rate', 'pd_score',
+    'bank_capital', 'risk_budget', 'macro_factor', 'total_profit', 'n_defaults', 'n_approved',
+]
+
+
+class VecBankLendingEnv(VecEnv if VecEnv else object):
+
+    metadata = {'render_modes': []}
+
+    def __init__(self, n_envs=64, customer_data=None, config=None, seed=42, full_info=False):
+        self.seed_val = seed
+        self.rng = np.random.default_rng(seed)
+
+        self.config = config or {}
+        self.LGD = self.config.get('lgd', 0.6)
+        self.RISK_LAMBDA = self.config.get('risk_lambda', 0.1)
+        self.MAX_MONTHS = self.config.get('max_months', 36)
+        self.INITIAL_CAPITAL = self.config.get('initial_capital', 1_000_000)
+        self.REWARD_SCALE = self.config.get('reward_scale', 10000)
+        self.full_info = full_info
+
+        self.pool = CustomerPool.coerce(customer_data, rng=self.rng)
+        self.n_customers = len(self.pool)
+
+        self.state_dim = 11
+        observation_space = spaces.Box(low=-1.0, high=1.0, shape=(self.state_dim,), dtype=np.float32)
+        action_space = spaces.Box(
+            low=np.array([-0.05, 0.5, 0.0], dtype=np.float32),
+            high=np.array([0.05, 1.5, 1.0], dtype=np.float32),
+            dtype=np.float32
+        )
+        if VecEnv:
+            super().__init__(n_envs, observation_space, action_space)
+        else:
+            self.num_envs = n_envs
+            self.observation_space = observation_space
+            self.action_space = action_space
+
+        n = n_envs
+        self.customer_idx = np.zeros(n, dtype=np.int64)
+        self.current_step = np.zeros(n, dtype=np.int64)
+        self.outstanding_loan = np.zeros(n)
+        self.interest_rate = np.zeros(n)
+        self.pd_score = np.zeros(n)
+        self.bank_capital = np.full(n, float(self.INITIAL_CAPITAL))
+        self.risk_budget = np.ones(n)
+        self.macro_factor = np.ones(n)
+        self.total_profit = np.zeros(n)
+        self.n_defaults = np.zeros(n, dtype=np.int64)
+        self.n_approved = np.zeros(n, dtype=np.int64)
+        self.defaulted = np.zeros(n, dtype=bool)
+
+        self._state_low = np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0.5])
+        self._state_high = np.array([1, 500000, 0.3, 500000, 1000000, 50000, 1, 48, 2 * self.INITIAL_CAPITAL, 1, 1.5])
+        self._customer_features = np.column_stack(
+            [self.pool[k] for k in ('income', 'credit_amount', 'annuity', 'ext_source', 'duration')]).astype(np.float64)
+        self._actions = None
+
+    def _normalize(self, val, low, high):
+        return np.clip(2 * (val - low) / (high - low + 1e-8) - 1, -1, 1)
+
+    def _get_state(self):
+        raw = np.column_stack((self.pd_score, self.outstanding_loan, self.interest_rate,
+                               self._customer_features[self.customer_idx],
+                               self.bank_capital, self.risk_budget, self.macro_factor))
+        return self._normalize(raw, self._state_low, self._state_high).astype(np.float32)
+
+    def _draw_customers(self, lanes):
+        idx = self.rng.integers(0, self.n_customers, size=len(lanes))
+        self.customer_idx[lanes] = idx
+        self.outstanding_loan[lanes] = self.pool['loan_amount'][idx]
+        self.interest_rate[lanes] = self.pool['base_interest'][idx]
+        self.pd_score[lanes] = self.pool['pd_score'][idx]
+
+    def _reset_lanes(self, lanes):
+        self._draw_customers(lanes)
+        self.current_step[lanes] = 0
+        self.total_profit[lanes] = 0
+        self.n_defaults[lanes] = 0
+        self.n_approved[lanes] = 0
+        self.macro_factor[lanes] = 1.0 + self.rng.normal(0, 0.05, size=len(lanes))
+        self.risk_budget[lanes] = 1.0
+
+    def reset(self):
+        self._reset_lanes(np.arange(self.num_envs))
+        return self._get_state()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, -1)
+
+    def step_wait(self):
+        a = self._actions
+        n = self.num_envs
+        self.current_step += 1
+
+        int_rate_adj = a[:, 0]
+        approve = a[:, 2] > 0.5
+
+        self.interest_rate = np.clip(self.interest_rate + int_rate_adj, 0.01, 0.25)
+        self.outstanding_loan *= a[:, 1]
+
+        pd_adj = 0.02 * int_rate_adj / 0.05
+        macro_adj = (1 - self.macro_factor) * 0.05
+        self.pd_score = np.clip(self.pd_score + pd_adj + macro_adj, 0.001, 0.99)
+
+        loan = self.outstanding_loan
+        pd_score = self.pd_score
+        interest_income = loan * self.interest_rate / 12
+        expected_loss = pd_score * self.LGD * loan
+        expected_profit = (1 - pd_score) * interest_income - pd_score * expected_loss
+        capital_consumption = pd_score * loan * 0.08
+        raw_reward = expected_profit - self.RISK_LAMBDA * capital_consumption
+        reward = np.where(approve, np.clip(raw_reward / self.REWARD_SCALE, -10, 10), -0.01)
+
+        self.n_approved += approve
+        self.bank_capital -= np.where(approve, capital_consumption, 0.0)
+        self.risk_budget = np.where(approve, np.maximum(0, self.risk_budget - pd_score * 0.005), self.risk_budget)
+
+        defaulted = approve & (self.rng.random(n) < pd_score / 12.0)
+        repaid = approve & ~defaulted
+        self.bank_capital -= np.where(defaulted, self.LGD * loan, 0.0)
+        self.n_defaults += defaulted
+        remaining_months = np.maximum(1, self.MAX_MONTHS - self.current_step)
+        principal_payment = loan / remaining_months
+        monthly_payment = loan * self.interest_rate / 12
+        self.bank_capital += np.where(repaid, monthly_payment + principal_payment, 0.0)
+        self.outstanding_loan = np.where(defaulted, loan * (1 - self.LGD), np.where(repaid, np.maximum(0, loan - principal_payment), loan))
+        self.defaulted = defaulted
+
+        self.macro_factor = np.clip(self.macro_factor + self.rng.normal(0, 0.02, size=n), 0.7, 1.3)
+
+        reward -= 2.0 * defaulted
+
+        paid_off = self.outstanding_loan <= 0
+        if paid_off.any():
+            reward += 0.5 * paid_off
+            self._draw_customers(np.flatnonzero(paid_off))
+
+        truncated = self.current_step >= self.MAX_MONTHS
+        terminated = ~truncated & (self.bank_capital <= 0)
+        reward = np.where(terminated, -10.0, reward)
+
+        if self.full_info:
+            infos = [{
+                'profit': float(self.total_profit[i]),
+                'defaulted': bool(defaulted[i]),
+                'bank_capital': float(self.bank_capital[i]),
+                'n_defaults': int(self.n_defaults[i]),
+                'n_approved': int(self.n_approved[i]),
+            } for i in range(n)]
+        else:
+            infos = [{} for _ in range(n)]
+        self.total_profit += reward
+
+        obs = self._get_state()
+        dones = truncated | terminated
+        if dones.any():
+            lanes = np.flatnonzero(dones)
+            for i in lanes:
+                infos[i]['terminal_observation'] = obs[i].copy()
+                infos[i]['TimeLimit.truncated'] = bool(truncated[i])
+                infos[i]['episode_profit'] = float(self.total_profit[i])
+            self._reset_lanes(lanes)
+            obs = self._get_state()
+
+        return obs, reward.astype(np.float32), dones, infos
+
+    def seed(self, seed=None):
+        self.seed_val = seed
+        self.rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def close(self):
+        pass
+
+    def _lanes(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        val = getattr(self, attr_name)
+        if attr_name in LANE_FIELDS:
+            return [val[i] for i in self._lanes(indices)]
+        return [val for _ in self._lanes(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        if attr_name in LANE_FIELDS:
+            getattr(self, attr_name)[list(self._lanes(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self, method_name)(*method_args, **method_kwargs) for _ in self._lanes(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._lanes(indices)]
+
+
+def benchmark_steps_per_sec(n_envs, n_steps=2000, seed=42):
+
+    rng = np.random.default_rng(seed)
+    low = np.array([-0.05, 0.5, 0.0], dtype=np.float32)
+    high = np.array([0.05, 1.5, 1.0], dtype=np.float32)
+
+    scalar = BankLendingEnv(seed=seed)
+    scalar.reset(seed=seed)
+    actions = rng.uniform(low, high, size=(n_steps, 3)).astype(np.float32)
+    t0 = time.perf_counter()
+    for i in range(n_steps):
+        _, _, terminated, truncated, _ = scalar.step(actions[i])
+        if terminated or truncated:
+            scalar.reset()
+    scalar_sps = n_steps / (time.perf_counter() - t0)
+
+    vec = VecBankLendingEnv(n_envs=n_envs, seed=seed)
+    vec.reset()
+    vec_iters = max(200, n_steps // n_envs)
+    batch = rng.uniform(low, high, size=(vec_iters, n_envs, 3)).astype(np.float32)
+    t0 = time.perf_counter()
+    for i in range(vec_iters):
+        vec.step_async(batch[i])
+        vec.step_wait()
+    vec_sps = vec_iters * n_envs / (time.perf_counter() - t0)
+
+    return {'n_envs': n_envs, 'scalar_steps_per_sec': scalar_sps, 'vec_steps_per_sec': vec_sps, 'speedup': vec_sps / scalar_sps}
+
+
+if __name__ == "__main__":
+    for n in (1, 64, 1024):
+        r = benchmark_steps_per_sec(n, n_steps=20000)
+        print(f"N={r['n_envs']:>5}: scalar {r['scalar_steps_per_sec']:>10.0f} steps/s | "
+              f"vectorized {r['vec_steps_per_sec']:>12.0f} steps/s | speedup {r['speedup']:.1f}x")
@@ -0,0 +1,53 @@
+from aegis.agents.compliance_agent import ComplianceAgent
+from aegis.agents.rule_engine import POLICY_RULES
+
+CONTRACT = {"interest_rate": 0.25, "tenure_months": 120, "grace_period": False, "restructure_pct": 0.0}
+
+
+def agent(**kw):
+    return ComplianceAgent(semantic=False, **kw)
+
+
+def test_equivalent_contracts_share_a_cache_entry():
+    a = agent()
+    first = a.validate(CONTRACT)
+    second = a.validate(dict(reversed(list({**CONTRACT, "interest_rate": 0.250000001}.items()))))
+    assert second == first
+    assert a.cache_info()["hits"] == 1 and a.cache_info()["size"] == 1
+
+
+def test_cached_results_are_not_aliased():
+    a = agent()
+    a.validate(CONTRACT)["violations"].append("tampered")
+    a.validate(CONTRACT)["flags"]["kyc_flag"] = True
+    res = a.validate(CONTRACT)
+    assert "tampered" not in res["violations"] and res["flags"]["kyc_flag"] is False
+
+
+def test_policy_change_invalidates_cache():
+    a = agent()
+    assert "interest rate cap exceeded" in a.validate(CONTRACT)["violations"]
+    a.set_policy([dict(r, limit=0.3) if r["id"] == "rate_cap" else r for r in POLICY_RULES])
+    assert len(a.cache) == 0
+    assert "interest rate cap exceeded" not in a.validate(CONTRACT)["violations"]
+
+
+def test_rule_change_invalidates_cache():
+    a = agent()
+    a.validate(CONTRACT)
+    key = a._key(a._canonical(CONTRACT))
+    a.rules = ["Tenure cannot exceed policy maximum"]
+    assert len(a.cache) == 0
+    assert a._key(a._canonical(CONTRACT)) != key
+    assert isinstance(a.rules, tuple)
+
+
+def test_lru_eviction_and_batch_hits():
+    a = agent(cache_size=2)
+    contracts = [dict(CONTRACT, tenure_months=m) for m in (12, 24, 36)]
+    results = a.validate_many(contracts + contracts[-1:])
+    assert results[3] == results[2] and results[3] is not results[2]
+    assert len(a.cache) == 2
+    assert a.cache_info()["hits"] == 1
+    a.validate(contracts[0])
+    assert a.cache_info()["misses"] == 4
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from aegis.agents.digital_twin import DigitalTwinAgent
+
+
+def reference(income, emi, forecast, credit_utilization):
+    ratio = emi / max(income, 1e-6)
+    sigmoid = lambda stress: float(np.clip(1.0 / (1.0 + np.exp(-3.0 * (ratio + 0.5 * stress - 0.6))), 0.0, 1.0))
+    stress = max(0.0, (emi - max(float(np.mean(forecast)), 1e-6)) / max(income, 1e-6))
+    traj = [sigmoid(max(0.0, (emi - max(float(v), 1e-6)) / max(income, 1e-6))) for v in forecast]
+    cu_adj = float(np.clip(credit_utilization - 0.3, -0.3, 0.7))
+    return float(np.clip(sigmoid(stress) + 0.2 * cu_adj, 0.0, 1.0)), stress, traj
+
+
+def test_batch_matches_per_borrower_reference():
+    rng = np.random.default_rng(0)
+    n = 200
+    income = rng.lognormal(8.3, 0.4, n)
+    income[:3] = 0.0
+    emi = income * rng.uniform(0.1, 0.9, n) + 50
+    cu = rng.uniform(0.0, 1.0, n)
+    F = income[:, None] * rng.uniform(-0.2, 1.2, (n, 1)) * (1 + rng.normal(0, 0.3, (n, 12)))
+    agent = DigitalTwinAgent(use_torch=False)
+    batch = agent.assess_batch(F, income, emi, cu)
+    for i in range(n):
+        p, stress, traj = reference(income[i], emi[i], F[i], cu[i])
+        row = agent.row(batch, i)
+        assert row["default_probability"] == pytest.approx(p, rel=1e-12, abs=1e-12)
+        assert row["liquidity_stress_score"] == pytest.approx(stress, rel=1e-12, abs=1e-12)
+        np.testing.assert_allclose(row["risk_trajectory_curve"], traj, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(row["survival_curve"], 1.0 - np.array(traj), rtol=1e-12, atol=1e-12)
+
+
+def test_scalar_helpers_use_the_batch_kernel():
+    agent = DigitalTwinAgent(use_torch=False)
+    forecast = np.linspace(800, 1200, 12)
+    p, stress, traj = reference(3000.0, 1500.0, forecast, 0.3)
+    assert agent.default_probability(3000.0, 0.0, 1500.0, forecast) == pytest.approx((p, stress))
+    assert agent._risk_trajectory(3000.0, 1500.0, forecast) == pytest.approx(traj)
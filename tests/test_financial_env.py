@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from aegis.environment.financial_env import BatchFinancialEnv, FinancialEnv, action_matrix
+from aegis.environment.reward_engine import COMPONENTS, compute_reward, weight_vector
+
+ACTIONS = [
+    {"rate_delta": -0.01, "tenure_delta": 12, "grace_toggle": True, "collateral_adjust": -0.02},
+    {"rate_delta": 0.0, "tenure_delta": 6, "grace_toggle": False, "collateral_adjust": 0.0},
+    {"rate_delta": 0.03, "tenure_delta": -6, "grace_toggle": False, "collateral_adjust": 0.5},
+]
+
+
+@pytest.mark.parametrize("weights", [None, {"bank_profit": 0.5, "fairness_deviation": 0.4}])
+def test_batch_env_matches_dict_env(weights):
+    rng = np.random.default_rng(0)
+    n, rounds = 64, 6
+    dp0, emi0, exposure0 = rng.beta(2, 8, n), rng.beta(2, 5, n), rng.uniform(0, 2, n)
+    acts = rng.integers(0, len(ACTIONS), (rounds, n))
+    fair = rng.uniform(0.7, 1.1, (rounds, n))
+    comp = rng.uniform(60, 100, (rounds, n))
+    table = action_matrix(ACTIONS)
+    batch = BatchFinancialEnv(n, weights)
+    batch.reset(dp0, emi0, exposure0)
+    envs = [FinancialEnv(dict(weights) if weights else None) for _ in range(n)]
+    for i, e in enumerate(envs):
+        e.reset({"default_probability": dp0[i], "emi_ratio": emi0[i], "bank_exposure": exposure0[i]})
+    for t in range(rounds):
+        rewards = batch.step(table[acts[t]], compliance_score=comp[t], fairness_index=fair[t])
+        for i, e in enumerate(envs):
+            _, r, details = e.step(ACTIONS[acts[t, i]], {"compliance_score": comp[t, i], "fairness_index": fair[t, i]})
+            assert rewards[i] == pytest.approx(r, rel=1e-12, abs=1e-12)
+            assert batch.details(i)["components"] == pytest.approx(details["components"])
+            assert batch.row(i) == pytest.approx({k: e.state[k] for k in batch.row(i)})
+
+
+def test_weight_vector_matches_compute_reward():
+    weights = {"bank_profit": 0.4, "default_probability": 0.3}
+    c = np.array([0.2, 0.9, 0.1, 0.05, 0.02])
+    env = BatchFinancialEnv(1, weights)
+    assert float(c @ env.w) == pytest.approx(compute_reward(dict(zip(COMPONENTS, c)), weights)[0])
+    env.set_weights({"bank_profit": 0.1})
+    np.testing.assert_array_equal(env.w, weight_vector({**weights, "bank_profit": 0.1}))
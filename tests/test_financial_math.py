@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from aegis.math.financial_math import (amortization_schedule, apr, apr_batch, emi, emi_batch, irr, irr_batch, npv,
+                                       npv_batch)
+
+
+def loans(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    P = rng.uniform(1_000, 200_000, n)
+    rate = rng.uniform(0.0, 0.3, n)
+    rate[:5] = 0.0
+    months = rng.integers(0, 61, n)
+    return P, rate, months
+
+
+def test_emi_batch_matches_scalar():
+    P, rate, months = loans()
+    np.testing.assert_allclose(emi_batch(P, rate, months), [emi(*x) for x in zip(P, rate, months)], rtol=1e-10)
+
+
+@pytest.mark.parametrize("m", [0, 1, 4, 12, 365])
+def test_apr_batch_matches_scalar(m):
+    rate = np.linspace(0.0, 0.4, 41)
+    np.testing.assert_allclose(apr_batch(rate, m), [apr(r, m) for r in rate], rtol=1e-10, atol=1e-15)
+
+
+def test_npv_batch_matches_scalar():
+    rng = np.random.default_rng(1)
+    C = rng.normal(100, 50, (200, 25))
+    r = rng.uniform(0.0, 0.05, 200)
+    np.testing.assert_allclose(npv_batch(C, r), [npv(c, x) for c, x in zip(C, r)], rtol=1e-10)
+    np.testing.assert_allclose(npv_batch(C, 0.01), [npv(c, 0.01) for c in C], rtol=1e-10)
+
+
+def test_irr_batch_matches_scalar():
+    P, rate, months = loans(seed=2)
+    P, rate, months = P[months > 0], rate[months > 0], months[months > 0]
+    E = emi_batch(P, rate, months)
+    C = np.where(np.arange(61) <= months[:, None], E[:, None], 0.0)
+    C[:, 0] = -P * 0.98
+    got = irr_batch(C)
+    np.testing.assert_allclose(npv_batch(C, got), 0.0, atol=1e-6 * P.max())
+    np.testing.assert_allclose(got, [irr(c) for c in C], rtol=1e-4, atol=1e-6)
+    assert np.isnan(irr_batch(np.ones((1, 5))))[0]
+
+
+def test_amortization_matches_closed_form():
+    P, rate, months = loans(seed=3)
+    s = amortization_schedule(P, rate, months, 60)
+    E = emi_batch(P, rate, months)
+    np.testing.assert_allclose(s["payment"].sum(axis=1), E * months, rtol=1e-10)
+    np.testing.assert_allclose(s["principal"].sum(axis=1), np.where(months > 0, P, 0.0), rtol=1e-8, atol=1e-6)
+    np.testing.assert_allclose(s["balance"][np.arange(len(P)), np.maximum(months - 1, 0)], 0.0, atol=1e-6)
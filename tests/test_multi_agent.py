@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from aegis.rl.multi_agent import CustomerAgent, RegulatorAgent, negotiate, negotiate_batch
+
+
+def proposals(n, seed=0):
+    rng = np.random.default_rng(seed)
+    actions = np.column_stack([rng.uniform(-0.05, 0.05, n), rng.uniform(0.5, 1.5, n), rng.random(n)]).astype(np.float32)
+    return {
+        'bank_actions': actions,
+        'interest_rate': rng.uniform(0.05, 0.2, n),
+        'outstanding_loan': rng.uniform(1e4, 2e5, n),
+        'duration': rng.integers(6, 37, n).astype(float),
+        'pd_score': rng.uniform(0.01, 0.3, n),
+        'bank_capital': np.full(n, 5e5),
+        'industry': rng.choice(['retail', 'energy', 'tech'], n),
+    }
+
+
+def regulator(book=('retail', 'energy', 'tech')):
+    reg = RegulatorAgent(max_portfolio_pd=0.2, max_industry_share=0.5)
+    for industry in book:
+        reg.add_loan(1e6, 0.05, industry)
+    return reg
+
+
+@pytest.mark.parametrize('use_industry', [False, True])
+def test_sequential_batch_matches_scalar_negotiate(use_industry):
+    p = proposals(300)
+    industry = p['industry'] if use_industry else None
+    reg_batch, reg_loop = regulator(), regulator()
+    approved, adjusted, penalties, loan_ids = negotiate_batch(
+        p['bank_actions'], CustomerAgent(seed=1), reg_batch, p['interest_rate'], p['outstanding_loan'],
+        p['duration'], p['pd_score'], p['bank_capital'], industry=industry)
+    customer = CustomerAgent(seed=1)
+    for i in range(len(p['bank_actions'])):
+        env = SimpleNamespace(interest_rate=p['interest_rate'][i], outstanding_loan=p['outstanding_loan'][i],
+                              MAX_MONTHS=int(p['duration'][i]), current_step=0, pd_score=p['pd_score'][i],
+                              LGD=0.6, bank_capital=p['bank_capital'][i])
+        ok, adj, pen, loan_id = negotiate(p['bank_actions'][i], customer, reg_loop, env,
+                                          industry=industry[i] if use_industry else None)
+        assert ok == approved[i]
+        assert pen == pytest.approx(penalties[i])
+        np.testing.assert_allclose(adj, adjusted[i], rtol=1e-6)
+        assert (loan_id if ok else -1) == loan_ids[i]
+    assert 0 < approved.sum() < len(approved)
+    assert reg_batch.exposure == pytest.approx(reg_loop.exposure)
+    assert reg_batch.industry_exposure == pytest.approx(reg_loop.industry_exposure)
+
+
+def test_snapshot_mode_enforces_industry_limit():
+    p = proposals(300, seed=2)
+    reg = regulator(('energy', 'retail'))
+    seeded = set(reg.loans)
+    held = dict(reg.industry_exposure)
+    exposure = reg.exposure
+    approved, adjusted, penalties, loan_ids = negotiate_batch(
+        p['bank_actions'], CustomerAgent(seed=1), reg, p['interest_rate'], p['outstanding_loan'], p['duration'],
+        p['pd_score'], np.full(300, 1e8), regulator_mode='snapshot', industry=p['industry'])
+    ind = p['industry']
+    loans = p['outstanding_loan'] * adjusted[:, 1]
+    share = (np.array([held.get(x, 0.0) for x in ind]) + loans) / (exposure + loans)
+    assert approved.any()
+    assert (share[approved] <= 0.5 + 1e-6).all()
+    assert (penalties[ind == 'energy'] > 0).any()
+    assert sorted(loan_ids[approved]) == sorted(set(reg.loans) - seeded)
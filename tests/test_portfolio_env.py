@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from aegis.rl.portfolio_env import LoanBook, PortfolioLendingEnv
+
+
+def make_env(**config):
+    config = {'initial_book_size': 2000, 'applicants_per_step': 50, 'initial_capital': 1e9, **config}
+    return PortfolioLendingEnv(seed=7, config=config)
+
+
+@pytest.mark.parametrize('action', [[0.0, 1.0, 1.0], [0.03, 0.8, 1.0], [0.0, 1.0, 0.0]])
+def test_capital_is_conserved_over_an_episode(action):
+    env = make_env()
+    env.reset(seed=1)
+    funds = env.bank_capital + env.capital_held
+    cash = 0.0
+    for _ in range(env.MAX_MONTHS):
+        _, _, terminated, truncated, info = env.step(np.array(action, dtype=np.float32))
+        cash += info['cash_flow']
+        assert env.capital_held == pytest.approx(info['capital_required'])
+        if terminated or truncated:
+            break
+    assert env.bank_capital + env.capital_held - funds == pytest.approx(cash, abs=1e-6 * funds)
+
+
+def test_reset_returns_held_capital():
+    env = make_env()
+    env.reset(seed=1)
+    for _ in range(5):
+        env.step(np.array([0.0, 1.0, 1.0], dtype=np.float32))
+    total = env.bank_capital + env.capital_held
+    assert env.capital_held > 0
+    env.reset(seed=2)
+    assert env.bank_capital + env.capital_held == pytest.approx(total, rel=1e-9)
+    env.reset(seed=3, options={'reset_capital': True})
+    assert env.bank_capital + env.capital_held == pytest.approx(env.INITIAL_CAPITAL, rel=1e-9)
+
+
+def test_defaults_recover_written_off_principal():
+    book = LoanBook()
+    book.add(np.full(1000, 100.0), 0.12, 0.99, 12)
+    flows = book.step(np.random.default_rng(0), lgd=0.6)
+    written_off = 100.0 * flows['n_defaults']
+    assert flows['n_defaults'] > 0
+    assert flows['loss'] == pytest.approx(0.6 * written_off)
+    assert flows['recovery'] == pytest.approx(0.4 * written_off)
+    book.recompute_totals()
+    assert book.exposure == pytest.approx(100.0 * (1000 - flows['n_defaults']) * (1 - 1 / 12))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from aegis.agents.risk_agent import BATCH_KEYS, RiskIntelligenceAgent
+
+
+def reference(x):
+    x = np.array(x, dtype=float)
+    if len(x) < 3:
+        x = np.pad(x, (0, 3 - len(x)), constant_values=np.mean(x))
+    slope = np.polyfit(np.arange(len(x)), x, 1)[0]
+    vol = np.std(x)
+    diffs = np.diff(x)
+    brk = np.max(np.abs(diffs)) / (np.std(diffs) + 1e-6)
+    p30 = np.clip(0.5 - 0.8 * slope / (np.mean(x) + 1e-6) + 0.3 * vol / (np.mean(x) + 1e-6), 0.0, 1.0)
+    p60 = np.clip(p30 + 0.1 * brk, 0.0, 1.0)
+    return {
+        "p30": p30,
+        "p60": p60,
+        "p90": np.clip(p60 + 0.1 * brk, 0.0, 1.0),
+        "cashflow_slope": slope,
+        "payment_volatility": vol,
+        "structural_break": brk,
+        "early_intervention_score": np.clip(1.0 - p30, 0.0, 1.0),
+        "payment_delay_trend": np.mean(diffs < 0),
+        "credit_dependency_growth": np.clip(-slope / (abs(np.mean(x)) + 1e-6) + vol / (abs(np.mean(x)) + 1e-6), 0.0, 1.0),
+    }
+
+
+@pytest.mark.parametrize('horizon', [2, 3, 12])
+def test_batch_matches_per_forecast_reference(horizon):
+    rng = np.random.default_rng(horizon)
+    X = rng.lognormal(8, 0.3, (50, 1)) * (1 + np.cumsum(rng.normal(0, 0.05, (50, horizon)), axis=1))
+    batch = RiskIntelligenceAgent().analyze_batch(X)
+    assert set(batch) == set(BATCH_KEYS)
+    for i, x in enumerate(X):
+        for k, v in reference(x).items():
+            assert batch[k][i] == pytest.approx(v, rel=1e-9, abs=1e-9), k
+
+
+def test_analyze_returns_the_batch_row():
+    rng = np.random.default_rng(0)
+    X = rng.normal(1000, 100, (20, 12))
+    agent = RiskIntelligenceAgent()
+    batch = agent.analyze_batch(X)
+    assert all(agent.row(batch, i) == agent.analyze(X[i].tolist()) for i in range(len(X)))
@@ -0,0 +1,39 @@
+import numpy as np
+from aegis.agents.digital_twin import DigitalTwinAgent
+from aegis.models.stat_forecaster import StatForecaster
+
+
+def series(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(4, 30, n)
+    return [1000 + 50 * np.sin(np.arange(k) / 2) + rng.normal(0, 20, k) for k in lengths]
+
+
+def test_seeded_forecasts_are_reproducible():
+    s = series()
+    a = StatForecaster(seed=11).predict(s)
+    b = StatForecaster(seed=11).predict(s)
+    np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(a, StatForecaster(seed=12).predict(s))
+
+
+def test_seeded_paths_are_reproducible():
+    s = series(seed=1)
+    a = StatForecaster(seed=5).fit_predict(s, n_paths=8)["paths"]
+    b = StatForecaster(seed=5).fit_predict(s, n_paths=8)["paths"]
+    assert a.shape == (len(s), 8, 12)
+    np.testing.assert_array_equal(a, b)
+
+
+def test_unseeded_forecast_is_the_deterministic_mean():
+    s = series(seed=2)
+    f = StatForecaster()
+    np.testing.assert_array_equal(f.predict(s), f.predict(s))
+    np.testing.assert_array_equal(f.predict(s), np.clip(f.fit_predict(s)["mean"], 0.0, None))
+
+
+def test_twin_seed_reaches_the_forecaster():
+    s = series(n=1, seed=3)[0]
+    a = DigitalTwinAgent(use_torch=False, seed=4).forecast(s)
+    b = DigitalTwinAgent(use_torch=False, seed=4).forecast(s)
+    np.testing.assert_array_equal(a, b)
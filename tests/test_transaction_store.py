@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from aegis.data.transaction_store import MonthlyAggregator, MonthlySeries, TransactionStore, UploadTooLarge
+
+
+def transactions(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "customer_id": rng.integers(0, 12, n),
+        "date": (np.datetime64("2023-06-01") + rng.integers(0, 500, n).astype("timedelta64[D]")).astype(str),
+        "amount": np.round(rng.normal(100, 300, n), 2),
+    })
+    df["customer_id"] = df["customer_id"].astype("Int64")
+    df.loc[::37, "customer_id"] = None
+    return df.to_csv(index=False).encode()
+
+
+def stream(data, chunk, **kw):
+    agg = MonthlyAggregator(max_bytes=None, **kw)
+    for i in range(0, len(data), chunk):
+        agg.feed(data[i:i + chunk])
+    return agg.finish()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 1000, 1 << 20])
+def test_chunk_boundaries_do_not_change_aggregates(chunk):
+    data = transactions()
+    ref = MonthlySeries.from_bytes(data)
+    got = stream(data, chunk)
+    assert list(got.customers) == list(ref.customers)
+    np.testing.assert_array_equal(got.months, ref.months)
+    np.testing.assert_array_equal(got.mask, ref.mask)
+    np.testing.assert_allclose(got.values, ref.values, rtol=1e-12, atol=1e-9)
+    assert got.n_missing == ref.n_missing > 0
+
+
+def test_months_and_customers_first_seen_in_later_chunks():
+    rows = ["customer_id,date,amount", "5,2024-06-03,1", "5,2024-07-03,2", "9,2023-01-10,4", "5,2025-02-01,8"]
+    data = ("\n".join(rows) + "\n").encode()
+    got = stream(data, len(rows[0]) + len(rows[1]) + 2)
+    assert list(got.customers) == ["5", "9"]
+    assert got.month_labels()[0] == "2023-01" and got.month_labels()[-1] == "2025-02"
+    np.testing.assert_array_equal(got.series(5), [1, 2, 8])
+    np.testing.assert_array_equal(got.series("9"), [4])
+
+
+def test_upload_and_file_paths_key_customers_alike(tmp_path):
+    data = transactions(seed=1)
+    path = tmp_path / "tx.csv"
+    path.write_bytes(data)
+    by_file = TransactionStore().get(str(path))
+    by_upload = stream(data, 100)
+    assert list(by_file.customers) == list(by_upload.customers)
+    for c in (0, "3", 11):
+        np.testing.assert_allclose(by_file.series(c), by_upload.series(c))
+
+
+def test_value_only_uploads_are_bounded():
+    data = ("value\n" + "1.5\n" * 50).encode()
+    np.testing.assert_array_equal(stream(data, 16, max_series_rows=50).series(), np.full(50, 1.5))
+    with pytest.raises(UploadTooLarge):
+        stream(data, 16, max_series_rows=49)
@@ -0,0 +1,27 @@
+import numpy as np
+from aegis.rl.bank_env import BankLendingEnv
+from aegis.rl.vec_bank_env import VecBankLendingEnv
+
+
+def test_observations_match_scalar_env():
+    vec = VecBankLendingEnv(n_envs=16, seed=3)
+    vec.reset()
+    vec.step(np.tile(np.array([0.01, 0.9, 1.0], dtype=np.float32), (16, 1)))
+    obs = vec._get_state()
+    env = BankLendingEnv(customer_data=vec.pool, seed=3)
+    env.reset(seed=3)
+    assert obs.shape == (16, env.state_dim) and obs.dtype == np.float32
+    for i in range(vec.num_envs):
+        env.customer_idx = int(vec.customer_idx[i])
+        for name in ('outstanding_loan', 'interest_rate', 'pd_score', 'bank_capital', 'risk_budget', 'macro_factor'):
+            setattr(env, name, float(getattr(vec, name)[i]))
+        np.testing.assert_array_equal(env._get_state(), obs[i])
+
+
+def test_observations_are_clipped():
+    vec = VecBankLendingEnv(n_envs=4, seed=0)
+    vec.reset()
+    vec.bank_capital[:] = [-1.0, 0.0, 1e12, vec.INITIAL_CAPITAL]
+    obs = vec._get_state()
+    assert obs.min() >= -1.0 and obs.max() <= 1.0
+    np.testing.assert_allclose(obs[:, 8], [-1.0, -1.0, 1.0, 0.0], atol=1e-6)